@@ -9,11 +9,10 @@ def vqe_ansatz(params):
     gate.RY(theta0, 0)
     gate.CNOT((0, 1))
 
-def energy(theta):
-    with PREPARE(2) as p:
-        USE("vqe_ansatz", theta)
-        MEASURE("expval", hamiltonian=H)
-    return p()
+# Built and compiled once; each call only binds new values to PARAM("theta").
+with PREPARE(2) as energy:
+    USE("vqe_ansatz", PARAM("theta"))
+    MEASURE("expval", hamiltonian=H)
 
 best_params, best_E = OPTIMISE(energy_fn=energy,
                                init_params=[0.1], 
@@ -25,4 +24,3 @@ best_params, best_E = OPTIMISE(energy_fn=energy,
 
 print("Final energy:", best_E)
 print("Final params:", best_params)
-
@@ -0,0 +1,206 @@
+# algorithms.py
+# The Examples/ algorithms, parameterised by qubit count n and depth (repetitions of the
+# core block). Each has a DSL builder returning a Program and a hand-written PennyLane
+# builder returning a QNode, so both paths run the same circuit.
+import numpy as np
+import pennylane as qml
+from dsl import *
+
+# ---Grover---
+
+@BLOCK("bench_grover_oracle")
+def grover_oracle(n):
+    # Marks |0...0>.
+    gate.X(*range(n))
+    gate.CTRL("Z", list(range(n - 1)), n - 1)
+    gate.X(*range(n))
+
+@BLOCK("bench_grover_diffusion")
+def grover_diffusion(n):
+    SUPERPOSE(*range(n))
+    USE("bench_grover_oracle", n)
+    SUPERPOSE(*range(n))
+
+def dsl_grover(n, depth):
+    with PREPARE(n) as p:
+        SUPERPOSE(*range(n))
+        for _ in range(depth):
+            USE("bench_grover_oracle", n)
+            USE("bench_grover_diffusion", n)
+        MEASURE("probs", *range(n))
+    return p
+
+def pl_grover(n, depth):
+    def oracle():
+        for w in range(n):
+            qml.PauliX(w)
+        qml.ctrl(qml.PauliZ(n - 1), control=range(n - 1))
+        for w in range(n):
+            qml.PauliX(w)
+
+    @qml.qnode(qml.device("default.qubit", wires=n))
+    def circuit():
+        for w in range(n):
+            qml.Hadamard(w)
+        for _ in range(depth):
+            oracle()
+            for w in range(n):
+                qml.Hadamard(w)
+            oracle()
+            for w in range(n):
+                qml.Hadamard(w)
+        return qml.probs(wires=range(n))
+    return circuit
+
+# ---QFT---
+
+@BLOCK("bench_qft")
+def qft(n):
+    for i in range(n):
+        SUPERPOSE(i)
+        for j in range(i + 1, n):
+            gate.CRZ(np.pi / 2**(j - i), j, i)
+    for i in range(n // 2):
+        gate.SWAP((i, n - 1 - i))
+
+def dsl_qft(n, depth):
+    with PREPARE(n) as p:
+        gate.X(*range(0, n, 2))
+        for _ in range(depth):
+            USE("bench_qft", n)
+        MEASURE("state")
+    return p
+
+def pl_qft(n, depth):
+    @qml.qnode(qml.device("default.qubit", wires=n))
+    def circuit():
+        for w in range(0, n, 2):
+            qml.PauliX(w)
+        for _ in range(depth):
+            for i in range(n):
+                qml.Hadamard(i)
+                for j in range(i + 1, n):
+                    qml.CRZ(np.pi / 2**(j - i), wires=[j, i])
+            for i in range(n // 2):
+                qml.SWAP(wires=[i, n - 1 - i])
+        return qml.state()
+    return circuit
+
+# ---Deutsch-Jozsa---
+# n - 1 input wires and one ancilla; the oracle is the balanced parity function.
+
+@BLOCK("bench_dj_oracle")
+def dj_oracle(n):
+    gate.CNOT(*[(w, n - 1) for w in range(n - 1)])
+
+def dsl_dj(n, depth):
+    with PREPARE(n) as p:
+        gate.X(n - 1)
+        SUPERPOSE(*range(n))
+        for _ in range(depth):
+            USE("bench_dj_oracle", n)
+        SUPERPOSE(*range(n - 1))
+        MEASURE("probs", *range(n - 1))
+    return p
+
+def pl_dj(n, depth):
+    @qml.qnode(qml.device("default.qubit", wires=n))
+    def circuit():
+        qml.PauliX(n - 1)
+        for w in range(n):
+            qml.Hadamard(w)
+        for _ in range(depth):
+            for w in range(n - 1):
+                qml.CNOT(wires=[w, n - 1])
+        for w in range(n - 1):
+            qml.Hadamard(w)
+        return qml.probs(wires=range(n - 1))
+    return circuit
+
+# ---Teleportation---
+# The state on wire 0 hops along the chain two wires at a time, with deferred corrections.
+
+_TELEPORT_STATE = np.array([1 / np.sqrt(2), 1 / np.sqrt(2)])
+
+@BLOCK("bench_teleport")
+def teleport(src, mid, dst):
+    BELL_PHI_PLUS(mid, dst)
+    gate.CNOT((src, mid))
+    SUPERPOSE(src)
+    gate.CNOT((mid, dst))
+    gate.CZ((src, dst))
+
+def dsl_teleport(n, depth):
+    hops = (n - 1) // 2
+    with PREPARE(n) as p:
+        STATE_PREP(_TELEPORT_STATE, 0)
+        for _ in range(depth):
+            for k in range(hops):
+                USE("bench_teleport", 2 * k, 2 * k + 1, 2 * k + 2)
+        MEASURE("state")
+    return p
+
+def pl_teleport(n, depth):
+    hops = (n - 1) // 2
+
+    @qml.qnode(qml.device("default.qubit", wires=n))
+    def circuit():
+        qml.StatePrep(_TELEPORT_STATE, wires=[0])
+        for _ in range(depth):
+            for k in range(hops):
+                src, mid, dst = 2 * k, 2 * k + 1, 2 * k + 2
+                qml.Hadamard(mid)
+                qml.CNOT(wires=[mid, dst])
+                qml.CNOT(wires=[src, mid])
+                qml.Hadamard(src)
+                qml.CNOT(wires=[mid, dst])
+                qml.CZ(wires=[src, dst])
+        return qml.state()
+    return circuit
+
+# ---VQE---
+# RY + CNOT-ladder ansatz against a nearest-neighbour ZZ Hamiltonian.
+
+def _zz_chain(n):
+    H = obs.Z(0) @ obs.Z(1)
+    for w in range(1, n - 1):
+        H = H + obs.Z(w) @ obs.Z(w + 1)
+    return H
+
+@BLOCK("bench_vqe_layer")
+def vqe_layer(n, layer):
+    for w in range(n):
+        gate.RY(PARAM("theta", layer * n + w), w)
+    gate.CNOT(*[(w, w + 1) for w in range(n - 1)])
+
+def dsl_vqe(n, depth):
+    with PREPARE(n) as p:
+        for layer in range(depth):
+            USE("bench_vqe_layer", n, layer)
+        MEASURE("expval", hamiltonian=_zz_chain(n))
+    return p
+
+def pl_vqe(n, depth):
+    H = _zz_chain(n)
+
+    @qml.qnode(qml.device("default.qubit", wires=n))
+    def circuit(theta):
+        for layer in range(depth):
+            for w in range(n):
+                qml.RY(theta[layer * n + w], wires=w)
+            for w in range(n - 1):
+                qml.CNOT(wires=[w, w + 1])
+        return qml.expval(H)
+    return circuit
+
+def vqe_args(n, depth):
+    return (np.linspace(0.1, 1.0, n * depth),)
+
+# name -> (DSL builder, PennyLane builder, call arguments, minimum qubits)
+ALGORITHMS = {
+    "grover": (dsl_grover, pl_grover, None, 2),
+    "qft": (dsl_qft, pl_qft, None, 1),
+    "dj": (dsl_dj, pl_dj, None, 2),
+    "teleport": (dsl_teleport, pl_teleport, None, 3),
+    "vqe": (dsl_vqe, pl_vqe, vqe_args, 2),
+}
@@ -0,0 +1,87 @@
+# checkpoint.py
+# Runs each circuit with and without prefix checkpoints, on the PennyLane and NumPy backends,
+# and exits non-zero if any result differs: resuming from a checkpoint must not change results.
+#
+#   python benchmarks/checkpoint.py --sizes 4 8 --depths 1 4
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from dsl import *
+
+TOLERANCE = 1e-9
+
+def layered(n, depth, seed=0):
+    # Fixed entangling layers, then PARAM rotations: the fixed part becomes the checkpoint.
+    rng = np.random.default_rng(seed)
+    with PREPARE(n) as p:
+        HARTREE_FOCK(n // 2, n)
+        for _ in range(depth):
+            for w in range(n):
+                gate.RY(float(rng.uniform(0, 2 * np.pi)), w)
+            gate.CNOT(*[(w, w + 1) for w in range(n - 1)])
+        for w in range(n):
+            gate.RX(PARAM("theta")[w], w)
+        MEASURE("probs", *range(n))
+        MEASURE("expval", hamiltonian=obs.Z(0) @ obs.Z(1))
+    return p
+
+def late_prep(n, depth, seed=0):
+    # A StatePrep after other gates: the checkpoint has to end before it.
+    rng = np.random.default_rng(seed)
+    with PREPARE(n) as p:
+        for _ in range(depth):
+            for w in range(n):
+                gate.H(w)
+                gate.RZ(float(rng.uniform(0, 2 * np.pi)), w)
+        STATE_PREP([0.6, 0.8], 0)
+        BASIS_STATE([1], [n - 1])
+        for w in range(n):
+            gate.RX(PARAM("theta")[w], w)
+        MEASURE("probs", *range(n))
+    return p
+
+CIRCUITS = {"layered": layered, "late_prep": late_prep}
+
+def _run(build, n, depth, backend, checkpoint, values):
+    set_checkpointing(checkpoint)
+    program = build(n, depth)
+    program.compile(backend=backend)
+    result = program(values)
+    return [np.asarray(r) for r in (result if isinstance(result, tuple) else (result,))]
+
+def measure(name, n, depth, backend):
+    values = np.linspace(0.1, 1.0, n)
+    plain = _run(CIRCUITS[name], n, depth, backend, False, values)
+    resumed = _run(CIRCUITS[name], n, depth, backend, True, values)
+    error = max(float(np.max(np.abs(a - b))) for a, b in zip(plain, resumed))
+    return {"circuit": name, "n": n, "depth": depth, "backend": backend,
+            "max_error": error, "match": error <= TOLERANCE}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Checkpointed vs uncheckpointed runs.")
+    parser.add_argument("--circuits", nargs="+", default=list(CIRCUITS), choices=list(CIRCUITS))
+    parser.add_argument("--backends", nargs="+", default=["pennylane", "numpy"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[2, 4, 6])
+    parser.add_argument("--depths", nargs="+", type=int, default=[1, 4])
+    args = parser.parse_args(argv)
+
+    results = []
+    try:
+        for name in args.circuits:
+            for backend in args.backends:
+                for n in args.sizes:
+                    for depth in args.depths:
+                        row = measure(name, n, depth, backend)
+                        results.append(row)
+                        print(f"{name:9} {backend:9} n={n:<3} depth={depth:<3} "
+                              f"max err={row['max_error']:.1e} {'ok' if row['match'] else 'MISMATCH'}")
+    finally:
+        set_checkpointing(True)
+    return 0 if all(row["match"] for row in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
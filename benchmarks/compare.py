@@ -0,0 +1,70 @@
+# compare.py
+# Compares two run.py result files and flags timings or memory that grew past a threshold.
+#
+#   python benchmarks/compare.py baseline.json results.json --threshold 0.2
+import argparse
+import json
+import sys
+
+METRICS = ("build_s", "compile_s", "first_execute_s", "execute_s", "peak_bytes")
+
+def _key(row):
+    return (row["algorithm"], row["impl"], row["n"], row["depth"])
+
+def _load(path):
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("meta", {}), {_key(row): row for row in data["results"]}
+
+def compare(baseline, current, threshold=0.2, min_seconds=1e-3):
+    # Ratios below min_seconds of absolute change are timer noise and never count as regressions.
+    regressions = []
+    for key in sorted(set(baseline) & set(current)):
+        for metric in METRICS:
+            old, new = baseline[key][metric], current[key][metric]
+            if old <= 0:
+                continue
+            ratio = new / old
+            noise = metric.endswith("_s") and abs(new - old) < min_seconds
+            if ratio > 1 + threshold and not noise:
+                regressions.append((key, metric, old, new, ratio))
+    return regressions
+
+def overhead(current):
+    # DSL time over hand-written PennyLane time, per configuration.
+    rows = []
+    for (algorithm, impl, n, depth), row in sorted(current.items()):
+        pl = current.get((algorithm, "pennylane", n, depth))
+        if impl == "pennylane" or pl is None:
+            continue
+        total = lambda r: r["build_s"] + r["compile_s"] + r["first_execute_s"]
+        rows.append((algorithm, impl, n, depth, total(row) / total(pl), row["execute_s"] / pl["execute_s"]))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    base_meta, baseline = _load(args.baseline)
+    meta, current = _load(args.current)
+    print(f"baseline {base_meta.get('commit')}  ->  current {meta.get('commit')}")
+
+    print("\nDSL / PennyLane (cold = build+compile+first call, warm = repeated call):")
+    for algorithm, impl, n, depth, cold, warm in overhead(current):
+        print(f"  {algorithm:9} {impl:14} n={n:<3} depth={depth:<3} cold x{cold:6.2f}  warm x{warm:6.2f}")
+
+    regressions = compare(baseline, current, args.threshold)
+    if not regressions:
+        print(f"\nNo regressions above {args.threshold:.0%}.")
+        return 0
+    print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+    for (algorithm, impl, n, depth), metric, old, new, ratio in regressions:
+        print(f"  {algorithm:9} {impl:14} n={n:<3} depth={depth:<3} {metric:16} {old:.4g} -> {new:.4g} (x{ratio:.2f})")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# precision.py
+# Compares single (complex64) against double (complex128) precision on the NumPy backend:
+# largest probability and expectation-value error, norm drift, time and statevector memory.
+# Exits non-zero if any error exceeds the documented envelope.
+#
+#   python benchmarks/precision.py --sizes 8 12 16 --depths 10 100 --out precision.json
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from dsl import *
+from algorithms import dsl_qft
+
+# Per-gate error budget: probabilities and Pauli expectations stay within
+# ENVELOPE_PER_GATE * sqrt(gates), and never within less than ENVELOPE_FLOOR.
+ENVELOPE_PER_GATE = 1e-6
+ENVELOPE_FLOOR = 1e-5
+
+def random_layers(n, depth, seed=0):
+    rng = np.random.default_rng(seed)
+    with PREPARE(n) as p:
+        for _ in range(depth):
+            for w in range(n):
+                gate.RY(float(rng.uniform(0, 2 * np.pi)), w)
+                gate.RZ(float(rng.uniform(0, 2 * np.pi)), w)
+            gate.CNOT(*[(w, w + 1) for w in range(n - 1)])
+        MEASURE("probs", *range(n))
+    return p
+
+def _with_expval(build):
+    # Adds a Z0 Z1 expectation next to the program's own probabilities.
+    def wrapped(n, depth):
+        p = build(n, depth)
+        ops = [op for op in p.ir.ops if hasattr(op, "name")]
+        with PREPARE(n) as q:
+            q.extend(ops)
+            MEASURE("probs", *range(n))
+            MEASURE("expval", hamiltonian=obs.Z(0) @ obs.Z(1))
+        return q
+    return wrapped
+
+CIRCUITS = {
+    "random": _with_expval(random_layers),
+    "qft": _with_expval(dsl_qft),
+}
+
+def _run(program, dtype, repeat):
+    program.memoize = False
+    program.compile(backend="numpy", dtype=dtype)
+    with PROFILE() as prof:
+        probs, expval = program()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        program()
+    return probs, float(expval), (time.perf_counter() - start) / repeat, prof.peak_state_bytes
+
+def measure(name, n, depth, repeat):
+    build = CIRCUITS[name]
+    p64, e64, t64, b64 = _run(build(n, depth), "complex128", repeat)
+    p32, e32, t32, b32 = _run(build(n, depth), "complex64", repeat)
+    gates = sum(hasattr(op, "name") for op in build(n, depth).ir.ops)
+    envelope = max(ENVELOPE_FLOOR, ENVELOPE_PER_GATE * np.sqrt(gates))
+    prob_error = float(np.max(np.abs(np.asarray(p32, dtype=float) - p64)))
+    expval_error = abs(e32 - e64)
+    return {
+        "circuit": name,
+        "n": n,
+        "depth": depth,
+        "gates": gates,
+        "max_prob_error": prob_error,
+        "expval_error": expval_error,
+        "norm_drift": float(abs(np.sum(np.asarray(p32, dtype=float)) - 1.0)),
+        "envelope": envelope,
+        "within_envelope": bool(prob_error <= envelope and expval_error <= envelope),
+        "double_s": t64,
+        "single_s": t32,
+        "double_state_bytes": b64,
+        "single_state_bytes": b32,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Single vs double precision on the NumPy backend.")
+    parser.add_argument("--circuits", nargs="+", default=list(CIRCUITS), choices=list(CIRCUITS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[6, 10, 14])
+    parser.add_argument("--depths", nargs="+", type=int, default=[1, 10, 50])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+    # These circuits have no PARAMs, so a checkpoint would turn every repeat into a copy.
+    set_checkpointing(False)
+
+    results = []
+    for name in args.circuits:
+        for n in args.sizes:
+            for depth in args.depths:
+                row = measure(name, n, depth, args.repeat)
+                results.append(row)
+                print(f"{name:7} n={n:<3} depth={depth:<4} gates={row['gates']:<6} "
+                      f"prob err={row['max_prob_error']:.1e} expval err={row['expval_error']:.1e} "
+                      f"(envelope {row['envelope']:.1e}) time x{row['single_s'] / row['double_s']:.2f} "
+                      f"memory x{row['single_state_bytes'] / row['double_state_bytes']:.2f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0 if all(row["within_envelope"] for row in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# run.py
+# Times IR build, compile and execution (and peak Python memory) for each algorithm over a
+# grid of qubit counts and depths, for the DSL backends and the hand-written PennyLane QNodes.
+#
+#   python benchmarks/run.py --sizes 4 8 12 --depths 1 4 --out results.json
+#   python benchmarks/compare.py baseline.json results.json
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pennylane as qml
+from dsl import clear_compile_cache, clear_device_pool, set_checkpointing
+from algorithms import ALGORITHMS
+
+IMPLEMENTATIONS = ("dsl-pennylane", "dsl-numpy", "pennylane")
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+def _stages(algorithm, impl, n, depth):
+    # Returns the (build, compile, execute) callables for one configuration.
+    dsl_build, pl_build, make_args, _ = ALGORITHMS[algorithm]
+    args = make_args(n, depth) if make_args else ()
+    if impl == "pennylane":
+        build = lambda: pl_build(n, depth)
+        compile_ = lambda qnode: (qml.workflow.construct_tape(qnode)(*args), qnode)[1]
+    else:
+        backend = impl.split("-", 1)[1]
+        build = lambda: dsl_build(n, depth)
+
+        def compile_(p):
+            # Timed executions must simulate every time rather than return the memoized result.
+            p.memoize = False
+            p.compile(backend=backend)
+            return p
+    execute = lambda compiled: compiled(*args)
+    return build, compile_, execute
+
+def _cold():
+    # Each configuration starts without cached compilations or pooled devices. Checkpoints
+    # are off so every timed execution simulates the whole circuit, as PennyLane does.
+    clear_compile_cache()
+    clear_device_pool()
+    set_checkpointing(False)
+
+def measure(algorithm, impl, n, depth, repeat):
+    build, compile_, execute = _stages(algorithm, impl, n, depth)
+
+    builds, compiles, firsts, executes = [], [], [], []
+    for _ in range(repeat):
+        _cold()
+        obj, t_build = _timed(build)
+        compiled, t_compile = _timed(compile_, obj)
+        _, t_first = _timed(execute, compiled)
+        _, t_exec = _timed(execute, compiled)
+        builds.append(t_build)
+        compiles.append(t_compile)
+        firsts.append(t_first)
+        executes.append(t_exec)
+
+    # Memory is measured in a separate pass, since tracemalloc slows everything down.
+    _cold()
+    tracemalloc.start()
+    execute(compile_(build()))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "algorithm": algorithm,
+        "impl": impl,
+        "n": n,
+        "depth": depth,
+        "build_s": float(np.median(builds)),
+        "compile_s": float(np.median(compiles)),
+        "first_execute_s": float(np.median(firsts)),
+        "execute_s": float(np.median(executes)),
+        "peak_bytes": int(peak),
+    }
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def metadata():
+    return {
+        "commit": _commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pennylane": qml.__version__,
+        "numpy": np.__version__,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS), choices=list(ALGORITHMS))
+    parser.add_argument("--impls", nargs="+", default=list(IMPLEMENTATIONS), choices=IMPLEMENTATIONS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[3, 6, 9, 12])
+    parser.add_argument("--depths", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="benchmark-results.json")
+    args = parser.parse_args(argv)
+
+    results = []
+    for algorithm in args.algorithms:
+        min_n = ALGORITHMS[algorithm][3]
+        for n in args.sizes:
+            if n < min_n:
+                continue
+            for depth in args.depths:
+                for impl in args.impls:
+                    row = measure(algorithm, impl, n, depth, args.repeat)
+                    results.append(row)
+                    print(f"{algorithm:9} {impl:14} n={n:<3} depth={depth:<3} "
+                          f"build={row['build_s'] * 1e3:8.2f}ms compile={row['compile_s'] * 1e3:8.2f}ms "
+                          f"execute={row['execute_s'] * 1e3:8.2f}ms peak={row['peak_bytes'] / 2**20:7.2f}MB")
+
+    with open(args.out, "w") as f:
+        json.dump({"meta": metadata(), "results": results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# startup.py
+# Times `import dsl` (and building a small program on the NumPy backend) in fresh
+# interpreters, and fails if PennyLane, matplotlib or qchem get imported on that path.
+#
+#   python benchmarks/startup.py --repeat 10 --out startup.json --budget 1.0
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pennylane", "matplotlib", "pennylane.qchem")
+
+SCENARIOS = {
+    "import": "import dsl",
+    "build+numpy": (
+        "import dsl\n"
+        "from dsl import *\n"
+        "with PREPARE(4) as p:\n"
+        "    SUPERPOSE(0)\n"
+        "    gate.CNOT((0, 1), (1, 2))\n"
+        "    gate.RY(PARAM('t'), 3)\n"
+        "    MEASURE('probs', 0, 1, 2, 3)\n"
+        "p.compile(backend='numpy')\n"
+        "p(0.1)\n"
+    ),
+}
+
+_PROBE = (
+    "import sys, time, json\n"
+    "start = time.perf_counter()\n"
+    "exec({code!r})\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))\n"
+)
+
+def run(code):
+    probe = _PROBE.format(code=code, heavy=HEAVY)
+    env = {**os.environ, "PYTHONPATH": ROOT + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True,
+                         check=True, env=env, cwd=ROOT)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure DSL import time.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=None,
+                        help="fail if the median of any scenario exceeds this many seconds")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    results, failed = {}, False
+    for name, code in SCENARIOS.items():
+        runs = [run(code) for _ in range(args.repeat)]
+        seconds = [r["seconds"] for r in runs]
+        loaded = runs[-1]["loaded"]
+        results[name] = {"median_s": float(np.median(seconds)), "min_s": min(seconds), "loaded": loaded}
+        print(f"{name:12} median={results[name]['median_s'] * 1e3:8.1f}ms "
+              f"min={results[name]['min_s'] * 1e3:8.1f}ms heavy modules loaded: {loaded or 'none'}")
+        if loaded or (args.budget is not None and results[name]["median_s"] > args.budget):
+            failed = True
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
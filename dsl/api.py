@@ -1,17 +1,30 @@
 #api.py
-from .program import Program, current_program
+from .program import Program, current_program, record_ops
+from .simulator import block_unitary
 from .ir import *
+from .ir import _freeze, _op_key
+from collections import deque
 from .compiler import *
-import pennylane as qml
-from matplotlib import pyplot as plt
-from pennylane import numpy as np
-from pprint import pformat
-from pennylane import qchem
-
-def PREPARE(n):
+from .diskcache import (hamiltonian_key, load_hamiltonian, store_hamiltonian,
+                        set_hamiltonian_cache, clear_hamiltonian_cache, hamiltonian_cache_info)
+# PennyLane, qchem, matplotlib and pprint are imported where they are first needed,
+# so `import dsl` and building IR stay cheap for workers that never plot.
+import numbers
+import numpy as np
+from functools import partial
+import os
+import time
+from . import profiling
+from .profiling import Profiler
+from concurrent.futures import ProcessPoolExecutor
+from .serialize import dumps_ir, loads_ir
+
+def PREPARE(n, compact=False, precision="double"):
     if not isinstance(n, int) or n <= 0:
         raise TypeError("PREPARE expects a postive integer for number of qubits")
-    return Program(width=n)
+    if precision not in PRECISIONS:
+        raise ValueError(f"PREPARE 'precision' must be one of {sorted(PRECISIONS)}.")
+    return Program(width=n, compact=compact, precision=precision)
 
 def SUPERPOSE(*wires):
     if not wires:
@@ -34,17 +47,21 @@ def BASIS_STATE(state, wire=None):
         raise ValueError(f"State length {len(state)} must match number of wires {len(wire)}")
     current_program().append(Op("BasisState", wire, params=(state,)))
 
+def CHECKPOINT():
+    # Everything before this point is simulated once and later runs resume from its state.
+    current_program().append(Op("CHECKPOINT", []))
+
 # ---Quantum Chemistry ---
 
 def SINGLE_EXCITATION(theta, wires):
-    if not isinstance(theta, (int, float)):
+    if not isinstance(theta, (int, float, Param)):
         raise TypeError("SINGLE_EXCITATION expects a numeric angle")
     if len(wires) != 2:
         raise ValueError("SINGLE_EXCITATION requires exactly 2 wires")
     current_program().append(Op("SingleExcitation", wires, params=(theta,)))
 
 def DOUBLE_EXCITATION(theta, wires):
-    if not isinstance(theta, (int, float)):
+    if not isinstance(theta, (int, float, Param)):
         raise TypeError("DOUBLE_EXCITATION expects a numeric angle")
     if len(wires) != 4:
         raise ValueError("DOUBLE_EXCITATION requires exactly 4 wires")
@@ -54,6 +71,7 @@ def HARTREE_FOCK(electrons, orbitals, basis='occupation_number'):
     wires = list(range(orbitals))
     current_program().append(Op("HartreeFock", wires, params=(electrons, basis)))
 
+@profiling.timed("hamiltonian")
 def MOLECULAR_HAMILTONIAN(
     symbols,
     geometry,
@@ -68,7 +86,23 @@ def MOLECULAR_HAMILTONIAN(
     wires=None,
     args=None,
     convert_tol=1e12,  
+    cache=True,
+    geometry_tol=1e-6,
 ):
+    # Differentiable 'args' runs are never cached; everything else is keyed on disk.
+    key = None
+    if cache and args is None:
+        key = hamiltonian_key(
+            symbols, geometry, geometry_tol,
+            charge=charge, mult=mult, basis=basis, method=method,
+            active_electrons=active_electrons, active_orbitals=active_orbitals,
+            mapping=mapping, wires=wires, convert_tol=convert_tol,
+        )
+        cached = load_hamiltonian(key)
+        if cached is not None:
+            return cached
+
+    from pennylane import qchem
     molecule = qchem.Molecule(
         symbols,
         geometry,
@@ -89,13 +123,20 @@ def MOLECULAR_HAMILTONIAN(
         convert_tol=convert_tol,
     )
 
+    if key is not None:
+        store_hamiltonian(key, H, n_qubits)
     return H, n_qubits
 
 # --- Results and Visualisation ---
 
 def MEASURE(kind, *wires, **kwargs):
-    if kind not in ("state", "probs", "expval"):
-        raise ValueError("MEASURE kind must be 'state', 'probs', or 'expval'.")
+    if kind not in ("state", "probs", "expval", "counts", "sample"):
+        raise ValueError("MEASURE kind must be 'state', 'probs', 'expval', 'counts' or 'sample'.")
+
+    # --- SHOT-BASED MEASURE (all wires when none are given) ---
+    if kind in ("counts", "sample"):
+        current_program().append(Measure(kind, wires or None))
+        return
 
     # --- PROBABILITY MEASURE ---
     if kind == "probs":
@@ -129,31 +170,80 @@ def MEASURE(kind, *wires, **kwargs):
         current_program().append(Measure(kind, wires))
         return    
 
-def DRAW(circ, draw_type="ascii"):
+@profiling.timed("draw")
+def DRAW(circ, draw_type="ascii", *args, **kwargs):
     if draw_type not in ("ascii", "diagram"):
         raise ValueError("DRAW 'draw_type' must be 'ascii' or 'diagram'.")
     if hasattr(circ, 'compile'):
+        # Drawing always goes through PennyLane, whichever backend the program runs on.
         circuit = circ._compiled
-        if circuit is None:
-            circ.compile()
-            circuit = circ._compiled
+        if circ.is_stale() or circ.backend != "pennylane" or circ.shots is not None:
+            circuit = compile_cached(circ.ir)
+        # Draw every gate rather than the StatePrep a checkpointed circuit starts from.
+        kwargs = {"_resume": False, **kwargs}
     else:
         circuit = circ
+    if isinstance(circuit, partial):
+        # Cached circuits are bound to their IR through keyword arguments.
+        kwargs = {**circuit.keywords, "_resume": False, **kwargs}
+        circuit = circuit.func
     
+    import pennylane as qml
     if draw_type == "ascii":
-        print(qml.draw(circuit)())
+        print(qml.draw(circuit)(*args, **kwargs))
     elif draw_type == "diagram":
-        fig, ax = qml.draw_mpl(circuit)()
+        from matplotlib import pyplot as plt
+        fig, ax = qml.draw_mpl(circuit)(*args, **kwargs)
         plt.show()
         return fig
 
-def GRAPH(program, graph_type="probs"):
+# Without top_k or threshold, GRAPH plots at most this many of the most likely states.
+GRAPH_MAX_BARS = 256
+
+def _marginal(probs, measured, wires):
+    # Sums `probs` (over the `measured` wires, first one most significant) down to `wires`.
+    missing = [w for w in wires if w not in measured]
+    if missing:
+        raise ValueError(f"GRAPH 'wires' {missing} are not among the measured wires {list(measured)}.")
+    axes = [measured.index(w) for w in wires]
+    others = tuple(i for i in range(len(measured)) if i not in axes)
+    table = probs.reshape((2,) * len(measured)).sum(axis=others)
+    # After the sum the kept axes are in measured order; reorder them to follow `wires`.
+    order = sorted(axes)
+    return np.transpose(table, [order.index(a) for a in axes]).reshape(-1)
+
+def _select_states(weights, top_k=None, threshold=None):
+    # Indices of the states to plot, in basis order, chosen by weight without sorting all 2^n.
+    idx = np.flatnonzero(weights >= threshold) if threshold is not None else None
+    if top_k is None and threshold is None and len(weights) > GRAPH_MAX_BARS:
+        print(f"GRAPH: showing the {GRAPH_MAX_BARS} most likely of {len(weights)} states; "
+              f"pass top_k or threshold to choose.")
+        top_k = GRAPH_MAX_BARS
+    if top_k is not None:
+        pool = weights if idx is None else weights[idx]
+        if top_k < len(pool):
+            best = np.argpartition(pool, -top_k)[-top_k:]
+            idx = best if idx is None else idx[best]
+    return np.arange(len(weights)) if idx is None else np.sort(idx)
+
+@profiling.timed("graph")
+def GRAPH(program, graph_type="probs", top_k=None, threshold=None, wires=None):
 
     if graph_type not in ("probs", "statevector", "expval"):
         raise ValueError("GRAPH 'graph_type' must be 'probs', 'statevector' or 'expval'.")
-
-
-    results = program()    
+    if top_k is not None and (not isinstance(top_k, int) or top_k <= 0):
+        raise ValueError("GRAPH 'top_k' must be a positive integer or None.")
+    if threshold is not None and (not isinstance(threshold, numbers.Real) or isinstance(threshold, bool)):
+        raise TypeError("GRAPH 'threshold' must be a number or None.")
+    if wires is not None and graph_type != "probs":
+        raise ValueError("GRAPH 'wires' marginalises probabilities and only applies to graph_type='probs'.")
+    from matplotlib import pyplot as plt
+
+
+    # Reuse the result of the last call when the program has not changed since.
+    results = program.last_result()
+    if results is None:
+        results = program()
     last_op = program.ir.ops[-1]
     kind = last_op.kind   
 
@@ -186,20 +276,23 @@ def GRAPH(program, graph_type="probs"):
 
 
     results = np.asarray(results)
-    n_states = len(results)
-    n_qubits = int(np.log2(n_states))
-    labels = [format(i, f'0{n_qubits}b') for i in range(n_states)]
 
     if graph_type == "probs":
         if kind == "state":
             probs = np.abs(results) ** 2
         elif kind == "probs":
-            probs = results
+            probs = np.asarray(results)
         else:
             raise ValueError("GRAPH(probs) requires MEASURE('state') or MEASURE('probs').")
+        if wires is not None:
+            measured = list(last_op.wires) if kind == "probs" and last_op.wires else list(range(program.ir.width))
+            probs = _marginal(probs, measured, [int(w) for w in np.atleast_1d(wires)])
+        n_qubits = int(np.log2(len(probs)))
+        idx = _select_states(probs, top_k, threshold)
+        labels = [format(i, f'0{n_qubits}b') for i in idx]
 
         plt.figure(figsize=(12, 6))
-        plt.bar(labels, probs)
+        plt.bar(labels, probs[idx])
 
         plt.xlabel('Basis States', fontsize=14)
         plt.ylabel('Probability', fontsize=14)
@@ -218,8 +311,11 @@ def GRAPH(program, graph_type="probs"):
         if kind != "state":
             raise ValueError("GRAPH('statevector') requires MEASURE('state') in the program.")
 
-        real_parts = np.real(results)
-        imag_parts = np.imag(results)
+        n_qubits = int(np.log2(len(results)))
+        idx = _select_states(np.abs(results) ** 2, top_k, threshold)
+        labels = [format(i, f'0{n_qubits}b') for i in idx]
+        real_parts = np.real(results[idx])
+        imag_parts = np.imag(results[idx])
 
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 7))
 
@@ -272,7 +368,15 @@ def BELL_PSI_MINUS(a, b):
     current_program().append(Op("X", [b]))
 
 def _is_numeric(x):
-    return isinstance(x, (int, float, np.number)) or hasattr(x, "__array__")
+    return isinstance(x, (int, float, np.number, Param)) or hasattr(x, "__array__")
+
+# ---Symbolic Parameters---
+def PARAM(name, index=None):
+    if not isinstance(name, str) or name.strip() == "":
+        raise TypeError("PARAM expects a non-empty string name.")
+    if index is not None and not isinstance(index, int):
+        raise TypeError("PARAM index must be an integer.")
+    return Param(name, index)
 
 class _Gate:
 
@@ -367,10 +471,10 @@ gate = _Gate()
 
 # --- Observables ---
 class _Obs:
-    def X(self, w): return qml.PauliX(w)
-    def Y(self, w): return qml.PauliY(w)
-    def Z(self, w): return qml.PauliZ(w)
-    def H(self, w): return qml.Hadamard(w)
+    def X(self, w): return PL_NAME_MAP["X"](w)
+    def Y(self, w): return PL_NAME_MAP["Y"](w)
+    def Z(self, w): return PL_NAME_MAP["Z"](w)
+    def H(self, w): return PL_NAME_MAP["H"](w)
 
 obs = _Obs()
 
@@ -378,15 +482,57 @@ obs = _Obs()
 # ---BLOCKS---
 
 _BLOCKS = {}
-
-def BLOCK(name=None):
+_BLOCK_OPTIONS = {}
+
+class BlockCache(LRUCache):
+    # Op sequences recorded from cached blocks, keyed by (name, frozen arguments).
+    def __init__(self, maxsize=256):
+        super().__init__(maxsize)
+
+    def invalidate(self, name):
+        for key in [k for k in self._entries if k[0] == name]:
+            del self._entries[key]
+
+    def info(self):
+        return {**super().info(), "ops": sum(len(ops) for ops in self._entries.values())}
+
+_BLOCK_CACHE = BlockCache()
+
+def _detached(op):
+    # Compact programs hand out views into their own arrays; cache plain Ops instead.
+    return op if isinstance(op, (Op, Measure)) else Op(op.name, op.wires, op.params)
+
+# Ops that prepare states rather than act as unitaries are never folded into a block matrix.
+_NON_UNITARY = {"StatePrep", "BasisState", "HartreeFock", "CHECKPOINT"}
+
+def _fused(ops, max_wires):
+    # One QubitUnitary for the whole block when it is small, parameter-free and measurement-free.
+    if len(ops) < 2 or not all(hasattr(op, "name") for op in ops):
+        return ops
+    if any(op.name in _NON_UNITARY or any(isinstance(p, Param) for p in op.params) for op in ops):
+        return ops
+    if len({w for op in ops for w in op.wires}) > max_wires:
+        return ops
+    try:
+        matrix, wires = block_unitary(ops)
+    except (ValueError, TypeError):
+        return ops
+    return (Op("QubitUnitary", wires, params=(matrix,)),)
+
+def BLOCK(name=None, cache=False, replace=False, unitary=False, max_wires=6):
     if not isinstance(name, str) or name.strip() == "":
         raise TypeError("@BLOCK requires a non-empty string name")
+    if unitary and (not isinstance(max_wires, int) or max_wires < 1):
+        raise ValueError("@BLOCK 'max_wires' must be a positive integer.")
     def _register(fn):
-        if name in _BLOCKS:
+        if name in _BLOCKS and not replace:
             print(f"RuntimeError: BLOCK {name} already exists.")
             return fn
         _BLOCKS[name] = fn
+        # A unitary block is always cached, since building its matrix is the expensive part.
+        _BLOCK_OPTIONS[name] = {"cache": bool(cache or unitary), "unitary": bool(unitary),
+                                "max_wires": max_wires}
+        _BLOCK_CACHE.invalidate(name)
         return fn
     return _register
 
@@ -394,10 +540,42 @@ def USE(name, *args, **kwargs):
     fn = _BLOCKS.get(name)
     if fn is None:
         raise ValueError(f"Unknown BLOCK {name}")
-    fn(*args, **kwargs)
+    if not _BLOCK_OPTIONS[name]["cache"]:
+        fn(*args, **kwargs)
+        return
+    try:
+        key = (name, _freeze(args), _freeze(tuple(sorted(kwargs.items()))))
+    except TypeError:
+        # Unhashable arguments: expand as usual.
+        fn(*args, **kwargs)
+        return
+    options = _BLOCK_OPTIONS[name]
+    program = current_program()
+    ops = _BLOCK_CACHE.get(key)
+    if ops is None and options["unitary"]:
+        ops = _fused(tuple(record_ops(program.ir.width, fn, *args, **kwargs)), options["max_wires"])
+        _BLOCK_CACHE.put(key, ops)
+    elif ops is None:
+        start = len(program.ir.ops)
+        fn(*args, **kwargs)
+        _BLOCK_CACHE.put(key, tuple(_detached(op) for op in program.ir.ops[start:]))
+        return
+    program.extend(ops)
+
+def set_block_cache(maxsize):
+    if not isinstance(maxsize, int) or maxsize < 0:
+        raise ValueError("Block cache 'maxsize' must be a non-negative integer.")
+    _BLOCK_CACHE.resize(maxsize)
+
+def clear_block_cache():
+    _BLOCK_CACHE.clear()
+
+def block_cache_info():
+    return _BLOCK_CACHE.info()
 
 # --- Optimise --- 
 
+@profiling.timed("optimise")
 def OPTIMISE(
     energy_fn,
     init_params,
@@ -406,13 +584,40 @@ def OPTIMISE(
     eps=1e-6,
     history=False,
     graph=False,
+    grad=None,
+    method="gd",
+    tol=None,
+    patience=1,
+    return_history=False,
+    seed=None,
+    spsa_c=0.1,
 ):
 
+    start = time.perf_counter()
     params = np.array(init_params, dtype=float)
     if params.ndim == 0:
         params = params.reshape((1,))
 
+    if method not in ("gd", "momentum", "adam", "spsa", "lbfgs"):
+        raise ValueError("OPTIMISE 'method' must be 'gd', 'momentum', 'adam', 'spsa' or 'lbfgs'.")
+
+    # Programs with PARAM angles get exact gradients; plain callables fall back to finite differences.
+    if grad is None:
+        grad = "param_shift" if hasattr(energy_fn, "ir") and energy_fn.ir.param_names() else "finite_diff"
+    if grad not in ("finite_diff", "param_shift"):
+        raise ValueError("OPTIMISE 'grad' must be 'finite_diff' or 'param_shift'.")
+    if grad == "param_shift" and not hasattr(energy_fn, "ir"):
+        raise TypeError("OPTIMISE(grad='param_shift') requires a Program built with PARAM angles.")
+
     energies = []
+    evaluations = [0]
+
+    def f(x):
+        evaluations[0] += 1
+        if hasattr(energy_fn, "ir"):
+            # An unindexed PARAM takes a scalar, not a length-1 broadcast batch.
+            x = energy_fn.ir.bind_vector(x)
+        return float(energy_fn(x))
 
     def central_diff(f, x):
         g = np.zeros_like(x)
@@ -422,57 +627,340 @@ def OPTIMISE(
             g[i] = (f(x_fwd) - f(x_bwd)) / (2 * eps)
         return g
 
-    for s in range(steps):
-        E = float(energy_fn(params))
-        energies.append(E)
+    if grad == "param_shift":
+        names = energy_fn.ir.param_names()
+        if len(names) != 1:
+            raise ValueError("OPTIMISE(grad='param_shift') expects a program with exactly one PARAM name.")
+        n_shifted = len(param_shift_irs(energy_fn.ir, names[0])[0])
 
-        if history:
-            print(f"Step {s:3d} | Energy = {E: .6f} | Params = {params}")
+    def value_and_grad(x):
+        if grad == "param_shift":
+            evaluations[0] += 1 + n_shifted
+            E, g = param_shift_grad(energy_fn.ir, x, backend=energy_fn.backend)
+            return E, np.array(g)
+        return f(x), central_diff(f, x)
 
-        g = central_diff(energy_fn, params)
-        params = params - stepsize * g
+    def log(s, E, x):
+        energies.append(E)
+        if history:
+            print(f"Step {s:3d} | Energy = {E: .6f} | Params = {x}")
+
+    # Stops once the energy change or gradient norm stays below tol for `patience` steps.
+    quiet = [0]
+    def converged(g=None):
+        if tol is None or len(energies) < 2:
+            return False
+        small = abs(energies[-1] - energies[-2]) < tol or (g is not None and np.linalg.norm(g) < tol)
+        quiet[0] = quiet[0] + 1 if small else 0
+        return quiet[0] >= patience
+
+    final_energy = None
+    if method == "lbfgs":
+        from scipy.optimize import minimize
+        x0 = np.asarray(params, dtype=float)
+        last_grad = [None]
+
+        def fun(x):
+            E, g = value_and_grad(x.reshape(x0.shape))
+            last_grad[0] = np.asarray(g, dtype=float).ravel()
+            return E, last_grad[0]
+
+        def callback(intermediate_result):
+            log(len(energies), float(intermediate_result.fun), intermediate_result.x)
+            if converged(last_grad[0]):
+                raise StopIteration
+
+        options = {"maxiter": steps}
+        if tol is not None:
+            # `tol` and `patience` are checked in the callback, not by SciPy's own tests.
+            options.update(ftol=0.0, gtol=0.0)
+        res = minimize(fun, x0.ravel(), jac=True, method="L-BFGS-B", callback=callback, options=options)
+        params, final_energy = np.array(res.x.reshape(x0.shape)), float(res.fun)
+    else:
+        rng = np.random.default_rng(seed)
+        velocity = np.zeros_like(params)
+        m, v = np.zeros_like(params), np.zeros_like(params)
+        beta1, beta2 = 0.9, 0.999
+        for s in range(steps):
+            if method == "spsa":
+                # Two evaluations per step whatever the parameter count; their mean is the logged energy.
+                a_k = stepsize / (s + 1) ** 0.602
+                c_k = spsa_c / (s + 1) ** 0.101
+                delta = rng.choice([-1.0, 1.0], size=params.shape)
+                E_plus, E_minus = f(params + c_k * delta), f(params - c_k * delta)
+                E = 0.5 * (E_plus + E_minus)
+                g = (E_plus - E_minus) / (2 * c_k) * delta
+                log(s, E, params)
+                params = params - a_k * g
+            else:
+                E, g = value_and_grad(params)
+                log(s, E, params)
+                if method == "momentum":
+                    velocity = 0.9 * velocity + g
+                    params = params - stepsize * velocity
+                elif method == "adam":
+                    m = beta1 * m + (1 - beta1) * g
+                    v = beta2 * v + (1 - beta2) * g ** 2
+                    m_hat = m / (1 - beta1 ** (s + 1))
+                    v_hat = v / (1 - beta2 ** (s + 1))
+                    params = params - stepsize * m_hat / (np.sqrt(v_hat) + 1e-8)
+                else:
+                    params = params - stepsize * g
+            if converged(None if method == "spsa" else g):
+                break
 
-    final_energy = float(energy_fn(params))
+    if final_energy is None:
+        final_energy = f(params)
 
     if graph:
+        from matplotlib import pyplot as plt
         plt.plot(range(len(energies)), energies)
         plt.xlabel("Step")
         plt.ylabel("Energy")
         plt.title("Energy vs Optimisation Step")
         plt.show()
 
+    if profiling.ACTIVE is not None:
+        profiling.ACTIVE.optimise_calls.append({
+            "method": method,
+            "steps": len(energies),
+            "evaluations": evaluations[0],
+            "seconds": time.perf_counter() - start,
+        })
+
+    if return_history:
+        return params, final_energy, {
+            "energies": energies,
+            "steps": len(energies),
+            "evaluations": evaluations[0],
+            "method": method,
+        }
     return params, final_energy
 
 
+# --- Profiling ---
+
+def PROFILE(callback=None):
+    # Use as `with PROFILE() as prof:`; `callback(phase, seconds)` fires as each phase ends.
+    if callback is not None and not callable(callback):
+        raise TypeError("PROFILE 'callback' must be callable.")
+    return Profiler(callback=callback)
+
+
+# --- Sweep ---
+
+def _sweep_worker(payload, backend, dtype, options):
+    # Runs in a pool process. Program.compile applies the same passes and backend routing as a
+    # local call, and compile_cached keeps that worker's circuits warm across tasks.
+    ir = loads_ir(payload)
+    program = Program(ir.width)
+    program.ir, program.backend, program.dtype = ir, backend, dtype
+    program.memoize = False
+    program.compile(**options)
+    return program()
+
+def _sweep_results(tasks, workers):
+    if workers <= 1 or len(tasks[0]) <= 1:
+        yield from map(_sweep_worker, *tasks)
+        return
+    # map() hands results back in input order, each as soon as it and its predecessors finish;
+    # the pool stays open while the caller iterates.
+    chunksize = max(1, len(tasks[0]) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_sweep_worker, *tasks, chunksize=chunksize)
+
+def SWEEP(program_factory, inputs, workers=None, backend=None, shots=None, seed=None, dtype=None):
+    # Programs are built here and shipped to workers as serialized IR, never as QNodes. Each one
+    # is compiled with its own compile() options unless `backend`, `dtype` or `shots` override them.
+    # Returns an iterator over the results in input order.
+    inputs = list(inputs)
+    # Independent child seeds, so no two inputs draw the same sample stream.
+    seeds = np.random.SeedSequence(seed).spawn(len(inputs))
+    payloads, backends, dtypes, options = [], [], [], []
+    for x, child in zip(inputs, seeds):
+        program = program_factory(x)
+        if not hasattr(program, "ir"):
+            raise TypeError("SWEEP 'program_factory' must return a Program.")
+        payloads.append(dumps_ir(program.ir))
+        # A program routed to the stabilizer engine is routed again by the worker's compile().
+        backends.append(program._routed_from or program.backend)
+        dtypes.append(program.dtype)
+        opts = dict(program._compile_options)
+        if backend is not None:
+            opts["backend"] = backend
+        if dtype is not None:
+            opts["dtype"] = resolve_dtype(dtype)
+        if shots is not None:
+            opts["shots"] = shots
+        if seed is not None or opts.get("seed") is None:
+            opts["seed"] = child
+        options.append(opts)
+    workers = workers or os.cpu_count() or 1
+    return _sweep_results((payloads, backends, dtypes, options), workers)
+
+
 # --- Inspect IR ---
 
-def INSPECT_IR(program, format="dict"):
-    if format not in ("dict", "text"):
-        raise ValueError("INSPECT_IR 'format' must be 'dict' or 'text'.")
+def _op_dict(op):
+    return {
+        "op": op.name if hasattr(op, "name") else "MEASURE",
+        "wires": op.wires,
+        "params": list(op.params) if hasattr(op, "params") else [],
+        "kind": op.kind if hasattr(op, "kind") else None
+    }
+
+def _param_text(p):
+    # Arrays (StatePrep vectors, QubitUnitary matrices) stay on one line, so every op is one line.
+    if hasattr(p, "__array__") and not isinstance(p, Param):
+        return np.array2string(np.asarray(p), separator=",", max_line_width=np.inf).replace("\n", "")
+    return repr(p)
+
+def _op_line(i, op):
+    if hasattr(op, "name"):
+        if op.params:
+            params = ", ".join(_param_text(p) for p in op.params)
+            params = f"({params},)" if len(op.params) == 1 else f"({params})"
+            return f"  {i}. {op.name}(wires={op.wires}, params={params})"
+        return f"  {i}. {op.name}(wires={op.wires})"
+    return f"  {i}. MEASURE(kind='{op.kind}', wires={op.wires})"
+
+def _selected_ops(ir, start=None, stop=None, gates=None, wires=None):
+    # Yields (1-based index, op) lazily, so slicing and filtering never copy the op list.
+    gates = None if gates is None else {gates} if isinstance(gates, str) else set(gates)
+    wires = None if wires is None else {int(w) for w in np.atleast_1d(wires)}
+    for i in range(len(ir.ops))[slice(start, stop)]:
+        op = ir.ops[i]
+        if gates is not None and getattr(op, "name", "MEASURE") not in gates:
+            continue
+        # A measurement without wires reads the whole register.
+        if wires is not None and op.wires and not wires.intersection(int(w) for w in op.wires):
+            continue
+        yield i + 1, op
+
+def _ir_summary(ir, ops):
+    # Gate counts, depth and per-wire usage in a single pass over `ops`.
+    counts, measurements, n_ops = {}, 0, 0
+    layer = np.zeros(ir.width, dtype=np.int64)
+    usage = np.zeros(ir.width, dtype=np.int64)
+    for _, op in ops:
+        n_ops += 1
+        if not hasattr(op, "name"):
+            measurements += 1
+            continue
+        counts[op.name] = counts.get(op.name, 0) + 1
+        w = [int(x) for x in op.wires]
+        if w:
+            usage[w] += 1
+            layer[w] = layer[w].max() + 1
+    return {
+        "qubits": ir.width,
+        "ops": n_ops,
+        "measurements": measurements,
+        "gate_counts": dict(sorted(counts.items(), key=lambda kv: -kv[1])),
+        "depth": int(layer.max()) if ir.width else 0,
+        "wire_usage": usage.tolist(),
+    }
+
+def _inspect_lines(ir, format, ops):
+    if format == "text":
+        yield f"Qubits: {ir.width}"
+        yield "\nInstructions:"
+        for i, op in ops:
+            yield _op_line(i, op)
+    else:
+        from pprint import pformat
+        yield f"{{'qubits': {ir.width}}}"
+        for i, op in ops:
+            yield f"{i}: " + pformat(_op_dict(op), sort_dicts=False, width=120)
+
+def _write_lines(lines, file):
+    # Writes one line at a time to a path or an open text file.
+    if hasattr(file, "write"):
+        for line in lines:
+            file.write(line + "\n")
+        return
+    with open(file, "w") as f:
+        _write_lines(lines, f)
+
+def INSPECT_IR(program, format="dict", stream=False, file=None, start=None, stop=None,
+               gates=None, wires=None):
+    if format not in ("dict", "text", "summary"):
+        raise ValueError("INSPECT_IR 'format' must be 'dict', 'text' or 'summary'.")
+    ir = getattr(program, "ir", program)
+    ops = _selected_ops(ir, start, stop, gates, wires)
+    if format == "summary":
+        summary = _ir_summary(ir, ops)
+        if file is not None:
+            from pprint import pformat
+            _write_lines([pformat(summary, indent=2, sort_dicts=False)], file)
+        return summary
+    if stream or file is not None:
+        # One op per line, produced lazily; nothing holds more than a single line.
+        lines = _inspect_lines(ir, format, ops)
+        if file is None:
+            return lines
+        _write_lines(lines, file)
+        return None
     if format == "dict":
         ir_data = {
-            "qubits": program.ir.width,
-            "operations": [
-                {
-                    "op": op.name if hasattr(op, "name") else "MEASURE",
-                    "wires": op.wires,
-                    "params": list(op.params) if hasattr(op, "params") else [],
-                    "kind": op.kind if hasattr(op, "kind") else None
-                }
-                for op in program.ir.ops
-            ]
+            "qubits": ir.width,
+            "operations": [_op_dict(op) for _, op in ops]
         }
+        from pprint import pformat
         return pformat(ir_data, indent=2, sort_dicts=False) 
-    elif format == "text":
-        lines = []
-        lines.append(f"Qubits: {program.ir.width}")
-        lines.append("\nInstructions:")
-        for i, op in enumerate(program.ir.ops, 1):
-            if hasattr(op, "name"):
-                if op.params:
-                    lines.append(f"  {i}. {op.name}(wires={op.wires}, params={op.params})")
-                else:
-                    lines.append(f"  {i}. {op.name}(wires={op.wires})")
-            else:
-                lines.append(f"  {i}. MEASURE(kind='{op.kind}', wires={op.wires})")
-        return "\n".join(lines)
+    return "\n".join(_inspect_lines(ir, format, ops))
+
+def _diff_lines(a, b, window):
+    # Streams the ops of `a` and `b`; after a mismatch, up to `window` ops of each side are
+    # buffered to find the nearest point where they line up again.
+    if a.width != b.width:
+        yield f"# qubits: {a.width} -> {b.width}"
+    ia, ib = enumerate(a.ops, 1), enumerate(b.ops, 1)
+    abuf, bbuf = deque(), deque()
+    equal = removed = added = 0
+
+    def fill(buf, it, size):
+        while len(buf) < size:
+            nxt = next(it, None)
+            if nxt is None:
+                return
+            buf.append((nxt[0], nxt[1], _op_key(nxt[1], True)))
+
+    while True:
+        fill(abuf, ia, 1)
+        fill(bbuf, ib, 1)
+        if not abuf and not bbuf:
+            break
+        if abuf and bbuf and abuf[0][2] == bbuf[0][2]:
+            abuf.popleft()
+            bbuf.popleft()
+            equal += 1
+            continue
+        fill(abuf, ia, window)
+        fill(bbuf, ib, window)
+        first_b = {}
+        for j, (_, _, key) in enumerate(bbuf):
+            first_b.setdefault(key, j)
+        best = (len(abuf), len(bbuf))
+        for i, (_, _, key) in enumerate(abuf):
+            j = first_b.get(key)
+            if j is not None and i + j < sum(best):
+                best = (i, j)
+        for _ in range(best[0]):
+            i, op, _ = abuf.popleft()
+            removed += 1
+            yield "-" + _op_line(i, op)[1:]
+        for _ in range(best[1]):
+            j, op, _ = bbuf.popleft()
+            added += 1
+            yield "+" + _op_line(j, op)[1:]
+    yield f"# {equal} equal, {removed} removed, {added} added"
+
+def DIFF_IR(a, b, window=64, file=None):
+    # Structural diff of two programs: "-" lines are ops only in `a`, "+" lines ops only in `b`.
+    if not isinstance(window, int) or window <= 0:
+        raise ValueError("DIFF_IR 'window' must be a positive integer.")
+    lines = _diff_lines(getattr(a, "ir", a), getattr(b, "ir", b), window)
+    if file is None:
+        return lines
+    _write_lines(lines, file)
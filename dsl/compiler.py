@@ -1,73 +1,317 @@
 # compiler.py
-import pennylane as qml
+# PennyLane is imported inside the functions that build QNodes or tapes, so the NumPy
+# backend and IR construction never load it.
+import numpy as np
+from functools import partial
+from . import profiling
 from .ir import *
+from . import simulator
+from .simulator import basis_bits, compile_to_numpy, prefix_state
+from .mps import compile_to_mps, mps_info, set_mps_options
+from .stabilizer import (compile_to_stabilizer, is_clifford, iter_tableau_samples, set_stabilizer_routing,
+                         stabilizer_routing)
+from .sampling import DEFAULT_CHUNK, analytic_ir, finite_shot_results
+
+
+def _apply_ir(ir, bindings, resume=False):
+    # With `resume`, the checkpoint prefix is replaced by a StatePrep of its cached state.
+    import pennylane as qml
+    start, initial = prefix_state(ir) if resume else (0, None)
+    if initial is not None:
+        qml.StatePrep(initial, wires=range(ir.width))
+    outputs = []
+    for op in (ir.ops[start:] if start else ir.ops):
+        if hasattr(op, "name"):
+            if op.name == "CHECKPOINT":
+                continue
+            elif op.name == "CTRL":
+                gate_name = op.params[0]
+                control_wires = op.wires[:-1]
+                target_wire = op.wires[-1]
+                base_gate = PL_NAME_MAP[gate_name]
+                qml.ctrl(base_gate, control=control_wires)(target_wire)
+            
+            elif op.name == "StatePrep":
+                state = op.params[0]
+                qml.StatePrep(state, op.wires)
+            
+            elif op.name == "BasisState":
+                state = op.params[0]
+                qml.BasisState(state, wires=op.wires)
+            
+            elif op.name == "HartreeFock":
+                qml.BasisState(np.array(basis_bits(op)), wires=op.wires)
+            
+            elif op.name == "DoubleExcitation":
+                theta = resolve(op.params[0], bindings)
+                qml.DoubleExcitation(theta, wires=op.wires)
+            
+            elif op.name == "SingleExcitation":
+                theta = resolve(op.params[0], bindings)
+                qml.SingleExcitation(theta, wires=op.wires)
+            else:
+                gate = PL_NAME_MAP[op.name]
+                if op.params:
+                    gate(*(resolve(p, bindings) for p in op.params), wires=op.wires)
+                else:
+                    gate(wires=op.wires)
+        else:   
+            outputs.append(op)
+
+    if not outputs:
+        raise RuntimeError("No MEASURE outputs specified.")
+
+    returns = []
+    for m in outputs:
+        if m.kind == "state":
+            returns.append(qml.state())
+        elif m.kind == "probs":
+            returns.append(qml.probs(wires=m.wires))
+        elif m.kind == "expval":
+            if getattr(m, "operator", None) is not None:
+                returns.append(qml.expval(m.operator))
+            else:
+                obs_gate = PL_NAME_MAP[m.observable]
+                returns.append(qml.expval(obs_gate(wires=m.wires)))
+        elif m.kind == "counts":
+            returns.append(qml.counts(wires=m.wires))
+        elif m.kind == "sample":
+            returns.append(qml.sample(wires=m.wires))
+        else:
+            print(f"RuntimeError: Unsupported MEASURE kind: {m.kind}")
+    return returns
+
+
+# --- Device Pool ---
+
+class DevicePool:
+    # Devices keyed by (backend name, width, shots), shared by every compiled circuit.
+    def __init__(self):
+        self.enabled = True
+        self.created = 0
+        self._devices = {}
+
+    def get(self, width, name="default.qubit", shots=None):
+        key = (name, width, shots)
+        dev = self._devices.get(key) if self.enabled else None
+        if dev is None:
+            import pennylane as qml
+            dev = qml.device(name, wires=width, shots=shots) if shots else qml.device(name, wires=width)
+            self.created += 1
+            if self.enabled:
+                self._devices[key] = dev
+        return dev
+
+    def release(self, width, name="default.qubit", shots=None):
+        self._devices.pop((name, width, shots), None)
+
+    def clear(self):
+        self._devices.clear()
+
+    def info(self):
+        return {"enabled": self.enabled, "devices": sorted(self._devices, key=repr), "created": self.created}
+
+_DEVICE_POOL = DevicePool()
+
+def get_device(width, name="default.qubit", shots=None):
+    return _DEVICE_POOL.get(width, name=name, shots=shots)
+
+def release_device(width, name="default.qubit", shots=None):
+    _DEVICE_POOL.release(width, name=name, shots=shots)
+
+def clear_device_pool():
+    _DEVICE_POOL.clear()
+
+def set_device_pooling(enabled):
+    _DEVICE_POOL.enabled = bool(enabled)
+    if not enabled:
+        _DEVICE_POOL.clear()
+
+def set_checkpointing(enabled):
+    # When enabled, the parameter-free prefix of a program is simulated once and reused.
+    simulator.CHECKPOINTING = bool(enabled)
+    settings_changed()
+
+def device_pool_info():
+    return _DEVICE_POOL.info()
 
 
 def compile_to_pennylane(ir):
-    dev = qml.device("default.qubit", wires=ir.width)
+    import pennylane as qml
+    dev = get_device(ir.width)
 
+    # `_ir` lets a cached circuit run any structurally identical IRProgram.
     @qml.qnode(dev)
-    def circuit():
-        outputs = []
-        for op in ir.ops:
-            if hasattr(op, "name"):
-                if op.name == "CTRL":
-                    gate_name = op.params[0]
-                    control_wires = op.wires[:-1]
-                    target_wire = op.wires[-1]
-                    base_gate = PL_NAME_MAP[gate_name]
-                    qml.ctrl(base_gate, control=control_wires)(target_wire)
-                
-                elif op.name == "StatePrep":
-                    state = op.params[0]
-                    qml.StatePrep(state, op.wires)
-                
-                elif op.name == "BasisState":
-                    state = op.params[0]
-                    qml.BasisState(state, wires=op.wires)
-                
-                elif op.name == "HartreeFock":
-                    electrons = op.params[0]
-                    basis = op.params[1] if len(op.params) > 1 else 'occupation_number'
-                    orbitals = len(op.wires)
-                    hf_state_array = qml.qchem.hf_state(electrons, orbitals, basis=basis)
-                    qml.BasisState(hf_state_array, wires=op.wires)
-                
-                elif op.name == "DoubleExcitation":
-                    theta = op.params[0]
-                    qml.DoubleExcitation(theta, wires=op.wires)
-                
-                elif op.name == "SingleExcitation":
-                    theta = op.params[0]
-                    qml.SingleExcitation(theta, wires=op.wires)
-                else:
-                    gate = PL_NAME_MAP[op.name]
-                    if op.params:
-                        gate(*op.params, wires=op.wires)
-                    else:
-                        gate(wires=op.wires)
-            else:   
-                outputs.append(op)
-
-        if not outputs:
-            raise RuntimeError("No MEASURE outputs specified.")
-
-        returns = []
-        for m in outputs:
-            if m.kind == "state":
-                returns.append(qml.state())
-            elif m.kind == "probs":
-                returns.append(qml.probs(wires=m.wires))
-            elif m.kind == "expval":
-                if getattr(m, "operator", None) is not None:
-                    returns.append(qml.expval(m.operator))
-                else:
-                    obs_gate = PL_NAME_MAP[m.observable]
-                    returns.append(qml.expval(obs_gate(wires=m.wires)))
-            else:
-                print(f"RuntimeError: Unsupported MEASURE kind: {m.kind}")
+    def circuit(*args, _ir=ir, _resume=True, **kwargs):
+        returns = _apply_ir(_ir, _ir.bind(*args, **kwargs), resume=_resume)
+        return returns[0] if len(returns) == 1 else tuple(returns)
+
+    return circuit
+
+
+BACKENDS = {
+    "pennylane": compile_to_pennylane,
+    "numpy": compile_to_numpy,
+    "mps": compile_to_mps,
+    "stabilizer": compile_to_stabilizer,
+}
+
+# Backends that accept a `dtype`; everything else runs in complex128.
+DTYPE_BACKENDS = {"numpy", "mps", "stabilizer"}
+PRECISIONS = {"single": np.complex64, "double": np.complex128}
+
+def resolve_dtype(dtype):
+    dtype = np.dtype(PRECISIONS.get(dtype, dtype) if isinstance(dtype, str) else dtype)
+    if dtype not in (np.complex64, np.complex128):
+        raise ValueError(f"Unsupported dtype {dtype}; expected complex64 ('single') or complex128 ('double').")
+    return dtype
+
+def get_compiler(backend, dtype=None):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Expected one of {sorted(BACKENDS)}.")
+    if dtype is None or resolve_dtype(dtype) == np.complex128:
+        return BACKENDS[backend]
+    if backend not in DTYPE_BACKENDS:
+        raise ValueError(f"Backend '{backend}' only runs in double precision; "
+                         f"use one of {sorted(DTYPE_BACKENDS)}.")
+    return partial(BACKENDS[backend], dtype=resolve_dtype(dtype))
+
 
+def compile_with_shots(ir, shots, backend="pennylane", rng=None, chunk_size=DEFAULT_CHUNK, dtype=None):
+    # Runs the exact circuit once and draws `shots` samples from its distributions in chunks.
+    rng = rng if rng is not None else np.random.default_rng()
+    if backend == "stabilizer":
+        # The tableau samples bit strings directly instead of going through 2^n probabilities.
+        return compile_to_stabilizer(ir, dtype=np.complex128 if dtype is None else dtype, shots=shots, rng=rng,
+                                     chunk_size=chunk_size)
+
+    def circuit(*args, _ir=ir, **kwargs):
+        analytic, layout = analytic_ir(_ir)
+        analytic.checkpoint_parent = _ir
+        results = compile_cached(analytic, backend=backend, dtype=dtype)(*args, **kwargs)
+        if sum(not hasattr(op, "name") for op in analytic.ops) == 1:
+            results = [results]
+        returns = finite_shot_results(layout, results, shots, rng, chunk_size)
         return returns[0] if len(returns) == 1 else tuple(returns)
 
     return circuit
 
+
+def ir_to_tape(ir, bindings, resume=True):
+    import pennylane as qml
+    with qml.queuing.AnnotatedQueue() as q:
+        _apply_ir(ir, bindings, resume=resume)
+    return qml.tape.QuantumScript.from_queue(q)
+
+
+def execute_batch(irs, *args, backend="pennylane", **kwargs):
+    # Runs several same-width IRPrograms with the same bound values in one device submission.
+    irs = list(irs)
+    if not irs:
+        return []
+    if backend != "pennylane":
+        circuit = compile_cached(irs[0], backend=backend)
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.count("executions", len(irs))
+        with profiling.phase("execute"):
+            return [circuit(*args, _ir=ir, **kwargs) for ir in irs]
+    import pennylane as qml
+    dev = get_device(irs[0].width)
+    tapes = [ir_to_tape(ir, ir.bind(*args, **kwargs)) for ir in irs]
+    if profiling.ACTIVE is not None:
+        profiling.ACTIVE.count("executions", len(tapes))
+        profiling.ACTIVE.state_bytes(16 * 2 ** irs[0].width)
+    with profiling.phase("execute"):
+        return list(qml.execute(tapes, dev))
+
+
+# --- Parameter-Shift Gradients ---
+
+_C_PLUS = (np.sqrt(2) + 1) / (4 * np.sqrt(2))
+_C_MINUS = (np.sqrt(2) - 1) / (4 * np.sqrt(2))
+_TWO_TERM = ((0.5, np.pi / 2), (-0.5, -np.pi / 2))
+_FOUR_TERM = ((_C_PLUS, np.pi / 2), (-_C_PLUS, -np.pi / 2),
+              (-_C_MINUS, 3 * np.pi / 2), (_C_MINUS, -3 * np.pi / 2))
+
+# gate name -> ((coefficient, shift), ...)
+SHIFT_RULES = {
+    "RX": _TWO_TERM,
+    "RY": _TWO_TERM,
+    "RZ": _TWO_TERM,
+    "CRX": _FOUR_TERM,
+    "CRY": _FOUR_TERM,
+    "CRZ": _FOUR_TERM,
+    "SingleExcitation": _FOUR_TERM,
+    "DoubleExcitation": _FOUR_TERM,
+}
+
+def param_shift_irs(ir, name):
+    # Shifted copies of `ir`, one per shift term of every op angle bound to PARAM `name`.
+    shifted, terms = [], []
+    for k, op in enumerate(ir.ops):
+        for j, p in enumerate(getattr(op, "params", ())):
+            if not isinstance(p, Param) or p.name != name:
+                continue
+            if op.name not in SHIFT_RULES:
+                raise ValueError(f"Gate {op.name} has no parameter-shift rule for PARAM '{name}'.")
+            for coeff, shift in SHIFT_RULES[op.name]:
+                params = list(op.params)
+                params[j] = Param(p.name, p.index, p.shift + shift)
+                ops = list(ir.ops)
+                ops[k] = Op(op.name, op.wires, params=tuple(params))
+                shifted.append(IRProgram(ir.width, ops))
+                shifted[-1].checkpoint_parent = ir
+                terms.append((coeff, 0 if p.index is None else p.index))
+    return shifted, terms
+
+def param_shift_grad(ir, values, backend="pennylane"):
+    # Returns (f(values), df/dvalues) from a single batch of shifted circuits.
+    values = np.asarray(values, dtype=float)
+    names = ir.param_names()
+    if len(names) != 1:
+        raise ValueError("Parameter-shift gradients expect a program with exactly one PARAM name.")
+    shifted, terms = param_shift_irs(ir, names[0])
+    results = execute_batch([ir] + shifted, ir.bind_vector(values), backend=backend)
+    grad = np.zeros(values.size)
+    for (coeff, index), r in zip(terms, results[1:]):
+        grad[index] += coeff * float(r)
+    return float(results[0]), grad.reshape(values.shape)
+
+
+# --- Compilation Cache ---
+
+class CompileCache(LRUCache):
+    def __init__(self, maxsize=128, include_params=False):
+        super().__init__(maxsize)
+        self.include_params = include_params
+
+    def info(self):
+        return {**super().info(), "include_params": self.include_params}
+
+_COMPILE_CACHE = CompileCache()
+
+def compile_cached(ir, backend="pennylane", dtype=None):
+    compiler = get_compiler(backend, dtype)
+    dtype = None if dtype is None else resolve_dtype(dtype).str
+    key = (backend, dtype, ir.structural_hash(include_params=_COMPILE_CACHE.include_params))
+    circuit = _COMPILE_CACHE.get(key)
+    if circuit is None:
+        circuit = compiler(ir)
+        _COMPILE_CACHE.put(key, circuit)
+    return partial(circuit, _ir=ir)
+
+def set_compile_cache(maxsize=None, include_params=None):
+    if maxsize is not None:
+        if not isinstance(maxsize, int) or maxsize < 0:
+            raise ValueError("Compile cache 'maxsize' must be a non-negative integer.")
+        _COMPILE_CACHE.resize(maxsize)
+    if include_params is not None and bool(include_params) != _COMPILE_CACHE.include_params:
+        # Keys computed under the old setting can no longer be looked up.
+        _COMPILE_CACHE.clear()
+        _COMPILE_CACHE.include_params = bool(include_params)
+
+def clear_compile_cache():
+    _COMPILE_CACHE.clear()
+
+def compile_cache_info():
+    return _COMPILE_CACHE.info()
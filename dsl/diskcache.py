@@ -0,0 +1,114 @@
+# diskcache.py
+import hashlib
+import json
+import os
+import numpy as np
+from .serialize import encode_operator, decode_operator
+
+class DiskCache:
+    # Content-addressed JSON store, evicting least recently used files beyond max_bytes.
+    def __init__(self, path, max_bytes=256 * 2**20):
+        self.path, self.max_bytes = path, max_bytes
+        self.hits = self.misses = 0
+
+    def _file(self, key):
+        return os.path.join(self.path, key + ".json")
+
+    def get(self, key):
+        try:
+            with open(self._file(key)) as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(self._file(key))
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        os.makedirs(self.path, exist_ok=True)
+        tmp = self._file(key) + f".{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp, self._file(key))
+        self.evict()
+
+    def _entries(self):
+        if not os.path.isdir(self.path):
+            return []
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith(".json"):
+                st = os.stat(os.path.join(self.path, name))
+                entries.append((st.st_mtime, st.st_size, name))
+        return sorted(entries)
+
+    def evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.path, name))
+            total -= size
+
+    def clear(self):
+        for _, _, name in self._entries():
+            os.remove(os.path.join(self.path, name))
+        self.hits = self.misses = 0
+
+    def info(self):
+        entries = self._entries()
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+_DEFAULT_PATH = os.environ.get(
+    "QDSL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "quantum-dsl"))
+_HAMILTONIAN_CACHE = DiskCache(os.path.join(_DEFAULT_PATH, "hamiltonians"))
+
+# ---Molecular Hamiltonians---
+
+def hamiltonian_key(symbols, geometry, geometry_tol, **options):
+    # Geometry is snapped to a grid of size geometry_tol so tiny float noise still hits.
+    grid = np.round(np.asarray(geometry, dtype=float) / geometry_tol).astype(np.int64)
+    payload = {
+        "symbols": list(symbols),
+        "geometry": grid.ravel().tolist(),
+        "shape": list(grid.shape),
+        "tol": geometry_tol,
+        **{k: repr(v) for k, v in sorted(options.items())},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def load_hamiltonian(key):
+    entry = _HAMILTONIAN_CACHE.get(key)
+    if entry is None:
+        return None
+    return decode_operator(entry["terms"]), entry["n_qubits"]
+
+def store_hamiltonian(key, H, n_qubits):
+    _HAMILTONIAN_CACHE.put(key, {"terms": encode_operator(H), "n_qubits": int(n_qubits)})
+
+def set_hamiltonian_cache(path=None, max_bytes=None):
+    if path is not None:
+        _HAMILTONIAN_CACHE.path = path
+    if max_bytes is not None:
+        if max_bytes < 0:
+            raise ValueError("Hamiltonian cache 'max_bytes' must be non-negative.")
+        _HAMILTONIAN_CACHE.max_bytes = max_bytes
+        _HAMILTONIAN_CACHE.evict()
+
+def clear_hamiltonian_cache():
+    _HAMILTONIAN_CACHE.clear()
+
+def hamiltonian_cache_info():
+    return _HAMILTONIAN_CACHE.info()
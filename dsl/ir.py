@@ -1,5 +1,8 @@
 # ir.py
-import pennylane as qml
+import hashlib
+from collections import OrderedDict
+from collections.abc import Mapping
+import numpy as np
 class Op:
     def __init__(self, name, wires, params=None):
         self.name, self.wires, self.params = name, wires, params or ()
@@ -11,36 +14,409 @@ class Measure:
         self.observable = observable  # "X", "Y", "Z", "H", etc.
         self.operator = operator  
 
+class Param:
+    # Symbolic placeholder for a gate angle, bound to a value when the program is called.
+    def __init__(self, name, index=None, shift=0.0):
+        self.name, self.index, self.shift = name, index, shift
+
+    def __getitem__(self, index):
+        if self.index is not None:
+            raise TypeError(f"PARAM {self!r} is already indexed.")
+        return Param(self.name, index, self.shift)
+
+    def resolve(self, bindings):
+        if self.name not in bindings:
+            raise ValueError(f"No value bound for PARAM '{self.name}'.")
+        value = bindings[self.name]
+        if self.index is not None:
+            value = value[self.index]
+        return value + self.shift if self.shift else value
+
+    def __repr__(self):
+        args = repr(self.name) if self.index is None else f"{self.name!r}, {self.index!r}"
+        if self.shift:
+            return f"PARAM({args}) + {self.shift!r}"
+        return f"PARAM({args})"
+
+def resolve(value, bindings):
+    return value.resolve(bindings) if isinstance(value, Param) else value
+
+def _value_key(value, include_values):
+    # PARAM placeholders and gate-name strings are structure; numbers and arrays are values.
+    if isinstance(value, Param):
+        return ("PARAM", value.name, value.index, value.shift if include_values else "#")
+    if isinstance(value, str):
+        return value
+    if not include_values:
+        return "#"
+    if hasattr(value, "__array__"):
+        arr = np.asarray(value)
+        return (arr.dtype.str, arr.shape, arr.tobytes())
+    return repr(value)
+
+def _freeze(value):
+    # Hashable cache key for a block or call argument; raises TypeError if there is none.
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__,) + tuple(_freeze(v) for v in value)
+    if isinstance(value, (Param, str)) or hasattr(value, "__array__"):
+        return _value_key(value, True)
+    hash(value)
+    # Keep the type so that 1, 1.0 and True select different entries.
+    return (type(value).__name__, value)
+
+# Bumped whenever a global execution setting changes, so memoized results from before are not reused.
+SETTINGS = {"generation": 0}
+
+def settings_changed():
+    SETTINGS["generation"] += 1
+
+class LRUCache:
+    # Bounded mapping that drops the least recently used entry first and counts hits and misses.
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > max(self.maxsize, 0):
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def info(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+# ---Compact Storage---
+MEASURE_OPCODE = -1
+
+def _opcode(name):
+    if name not in OPCODES:
+        OPCODES[name] = len(OP_NAMES)
+        OP_NAMES.append(name)
+    return OPCODES[name]
+
+def _grow(arr, needed):
+    if needed <= len(arr) and arr.flags.writeable:
+        return arr
+    out = np.empty(max(needed, 2 * len(arr), 16), dtype=arr.dtype)
+    out[:len(arr)] = arr
+    return out
+
+def _op_key(op, include_params):
+    if hasattr(op, "name"):
+        return (op.name, tuple(op.wires), tuple(_value_key(p, include_params) for p in op.params))
+    wires = tuple(op.wires) if op.wires is not None else None
+    operator = getattr(op, "operator", None)
+    if operator is not None:
+        operator = repr(operator) if include_params else type(operator).__name__
+    return ("MEASURE", op.kind, wires, op.observable, operator)
+
+class OpView:
+    # Read-only Op interface over one row of a CompactOps store.
+    __slots__ = ("_store", "_i")
+    def __init__(self, store, i):
+        self._store, self._i = store, i
+    @property
+    def name(self):
+        return OP_NAMES[self._store.opcodes[self._i]]
+    @property
+    def wires(self):
+        s = self._store
+        return s.wires[s.wire_offsets[self._i]:s.wire_offsets[self._i + 1]].tolist()
+    @property
+    def params(self):
+        s = self._store
+        if self._i in s.extras:
+            return s.extras[self._i]
+        return tuple(s.params[s.param_offsets[self._i]:s.param_offsets[self._i + 1]].tolist())
+
+class CompactOps:
+    # Struct-of-arrays op list: integer opcodes, flat wire and float parameter arrays with
+    # offsets. Non-float params (PARAM, gate names, arrays) and Measures live in side tables.
+    def __init__(self, ops=None):
+        self._n = 0
+        self._opcodes = np.empty(0, dtype=np.int16)
+        self._wire_offsets = np.zeros(1, dtype=np.int64)
+        self._param_offsets = np.zeros(1, dtype=np.int64)
+        self._wires = np.empty(0, dtype=np.int32)
+        self._params = np.empty(0, dtype=np.float64)
+        self.extras, self.measures = {}, {}
+        self.extend(ops or [])
+
+    @classmethod
+    def from_arrays(cls, opcodes, wire_offsets, wires, param_offsets, params, extras=None, measures=None):
+        # Wraps existing (possibly memory-mapped, read-only) arrays; they are copied on first append.
+        store = cls()
+        store._n = len(opcodes)
+        store._opcodes, store._wires, store._params = opcodes, wires, params
+        store._wire_offsets, store._param_offsets = wire_offsets, param_offsets
+        store.extras, store.measures = dict(extras or {}), dict(measures or {})
+        return store
+
+    @property
+    def opcodes(self):
+        return self._opcodes[:self._n]
+    @property
+    def wire_offsets(self):
+        return self._wire_offsets[:self._n + 1]
+    @property
+    def param_offsets(self):
+        return self._param_offsets[:self._n + 1]
+    @property
+    def wires(self):
+        return self._wires[:self._wire_offsets[self._n]]
+    @property
+    def params(self):
+        return self._params[:self._param_offsets[self._n]]
+
+    def append(self, op):
+        i = self._n
+        self._opcodes = _grow(self._opcodes, i + 1)
+        self._wire_offsets = _grow(self._wire_offsets, i + 2)
+        self._param_offsets = _grow(self._param_offsets, i + 2)
+        w0, p0 = self._wire_offsets[i], self._param_offsets[i]
+        if not hasattr(op, "name"):
+            self._opcodes[i] = MEASURE_OPCODE
+            self.measures[i] = op
+            wires, params = [], []
+        else:
+            self._opcodes[i] = _opcode(op.name)
+            wires, params = list(op.wires), list(op.params)
+            if not all(isinstance(p, (int, float, np.integer, np.floating)) for p in params):
+                self.extras[i] = tuple(params)
+                params = []
+        self._wires = _grow(self._wires, w0 + len(wires))
+        self._wires[w0:w0 + len(wires)] = wires
+        self._params = _grow(self._params, p0 + len(params))
+        self._params[p0:p0 + len(params)] = params
+        self._wire_offsets[i + 1] = w0 + len(wires)
+        self._param_offsets[i + 1] = p0 + len(params)
+        self._n = i + 1
+
+    def extend(self, ops):
+        for op in ops:
+            self.append(op)
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("op index out of range")
+        if self._opcodes[i] == MEASURE_OPCODE:
+            return self.measures[i]
+        return OpView(self, i)
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self[i]
+
+    def gate_counts(self):
+        counts = np.bincount(self.opcodes[self.opcodes >= 0], minlength=len(OP_NAMES))
+        return {OP_NAMES[k]: int(c) for k, c in enumerate(counts) if c}
+
+    def param_names(self):
+        names = []
+        for params in self.extras.values():
+            for p in params:
+                if isinstance(p, Param) and p.name not in names:
+                    names.append(p.name)
+        return names
+
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.opcodes, self.wire_offsets, self.param_offsets,
+                                      self.wires, self.params))
+
 class IRProgram:
-    def __init__(self, width, ops=None):
-        self.width, self.ops = width, list(ops or [])
-    def canon(self):
+    def __init__(self, width, ops=None, compact=False):
+        self.width = width
+        self.ops = CompactOps(ops) if compact else list(ops or [])
+    @property
+    def compact(self):
+        return isinstance(self.ops, CompactOps)
+    def param_names(self):
+        if self.compact:
+            return self.ops.param_names()
+        names = []
+        for op in self.ops:
+            for p in getattr(op, "params", ()):
+                if isinstance(p, Param) and p.name not in names:
+                    names.append(p.name)
+        return names
+    def param_width(self):
+        # Values bound per call: 1 + the largest PARAM index, or 0 when PARAMs are never indexed.
+        indices = [p.index for op in self.ops for p in getattr(op, "params", ())
+                   if isinstance(p, Param) and p.index is not None]
+        return max(indices) + 1 if indices else 0
+    def param_layout(self):
+        # (name, width) per PARAM name in binding order; width 0 means the PARAM is never indexed.
+        widths = dict.fromkeys(self.param_names(), 0)
+        for op in self.ops:
+            for p in getattr(op, "params", ()):
+                if isinstance(p, Param) and p.index is not None:
+                    widths[p.name] = max(widths[p.name], p.index + 1)
+        return list(widths.items())
+    def split_columns(self, values):
+        # One positional argument per PARAM name from a 2-D array with one row per parameter set.
+        # Each name takes `width` columns in binding order, or one column if it is never indexed.
+        layout = self.param_layout()
+        expected = sum(max(width, 1) for _, width in layout)
+        if values.shape[1] != expected:
+            raise ValueError(f"Expected {expected} value(s) per parameter set "
+                             f"({', '.join(f'{n}: {max(w, 1)}' for n, w in layout)}), got {values.shape[1]}.")
+        args, column = [], 0
+        for _, width in layout:
+            args.append(values[:, column:column + width].T if width else values[:, column])
+            column += max(width, 1)
+        return args
+    def bind_vector(self, values):
+        # A 1-D parameter vector as the call argument: scalar for an unindexed PARAM.
+        values = np.asarray(values, dtype=float)
+        if self.param_width() or values.ndim == 0:
+            return values
+        if values.size != 1:
+            raise ValueError(f"Program has one unindexed PARAM but {values.size} values were given.")
+        return values.reshape(-1)[0]
+    def structural_hash(self, include_params=True):
+        # Content hash over width, op names, wires and measurement kinds.
+        h = hashlib.sha1(repr(self.width).encode())
+        if self.compact:
+            # Hash the arrays directly; only side-table entries need per-op keys.
+            o = self.ops
+            for arr in (o.opcodes, o.wire_offsets, o.wires):
+                h.update(arr.tobytes())
+            if include_params:
+                h.update(o.param_offsets.tobytes())
+                h.update(o.params.tobytes())
+            for i in sorted(o.extras) + sorted(o.measures):
+                h.update(repr((i, _op_key(o[i], include_params))).encode())
+            return h.hexdigest()
+        for op in self.ops:
+            h.update(repr(_op_key(op, include_params)).encode())
+            h.update(b"\x00")
+        return h.hexdigest()
+    def bind(self, *args, **kwargs):
+        # Positional values bind to PARAM names in order of first appearance.
+        names = self.param_names()
+        if len(args) > len(names):
+            raise TypeError(f"Program takes {len(names)} parameter value(s) but {len(args)} were given.")
+        bindings = dict(zip(names, args))
+        bindings.update(kwargs)
+        missing = [n for n in names if n not in bindings]
+        if missing:
+            raise TypeError(f"Missing values for PARAM {missing}.")
+        return bindings
+    def checkpoint_length(self):
+        # Ops up to the last CHECKPOINT marker, else the leading run of gates that depend on
+        # no PARAM value. That prefix yields the same state on every call. A PARAM-free
+        # program has no checkpoint: caching its whole circuit would leave nothing to run.
+        # The prefix also stops before a state preparation that is not the first op, since
+        # resuming would turn it into the first op and change what it means.
+        marker, end, param, prep = None, None, None, None
+        for i, op in enumerate(self.ops):
+            if not hasattr(op, "name"):
+                end = i if end is None else end
+                break
+            if op.name == "CHECKPOINT":
+                marker = i
+            elif end is None and any(isinstance(p, Param) for p in op.params):
+                end = param = i
+            elif prep is None and i > 0 and op.name in ("StatePrep", "BasisState", "HartreeFock"):
+                prep = i
+        if marker is not None:
+            if end is not None and end < marker:
+                raise ValueError("CHECKPOINT() must come before any PARAM-dependent gate or MEASURE.")
+            length = marker
+        else:
+            length = param if param is not None else 0
+        return min(length, prep) if prep is not None else length
+    def canon(self, opt_level=0):
         for op in self.ops:
             if hasattr(op, "name"):
                 if op.name not in PL_NAME_MAP:
                     print(f"NameError: Unknown gate {op.name}.")
+        self.removed_ops = 0
+        if opt_level:
+            from .passes import optimise
+            self.removed_ops = optimise(self, level=opt_level)
         return self
 
 #Map
-PL_NAME_MAP = {
-    "H": qml.Hadamard,
-    "X": qml.PauliX,
-    "Y": qml.PauliY,
-    "Z": qml.PauliZ,
-    "SWAP": qml.SWAP,
-    "CNOT": qml.CNOT,
-    "RX": qml.RX,
-    "RY": qml.RY,
-    "RZ": qml.RZ,
-    "CZ": qml.CZ,
-    "CY": qml.CY,
-    "CRX": qml.CRX, 
-    "CRY": qml.CRY,
-    "CRZ": qml.CRZ,
+class _LazyGateMap(Mapping):
+    # Gate name -> PennyLane class. PennyLane is only imported on the first lookup, so
+    # building and inspecting IR (or running the NumPy backend) never loads it.
+    def __init__(self, attrs):
+        self._attrs, self._classes = dict(attrs), {}
+    def __getitem__(self, name):
+        attr = self._attrs[name]
+        if attr is None:
+            return None
+        if name not in self._classes:
+            import pennylane as qml
+            self._classes[name] = getattr(qml, attr)
+        return self._classes[name]
+    def __contains__(self, name):
+        return name in self._attrs
+    def __iter__(self):
+        return iter(self._attrs)
+    def __len__(self):
+        return len(self._attrs)
+
+PL_NAME_MAP = _LazyGateMap({
+    "H": "Hadamard",
+    "X": "PauliX",
+    "Y": "PauliY",
+    "Z": "PauliZ",
+    "SWAP": "SWAP",
+    "CNOT": "CNOT",
+    "RX": "RX",
+    "RY": "RY",
+    "RZ": "RZ",
+    "CZ": "CZ",
+    "CY": "CY",
+    "CRX": "CRX",
+    "CRY": "CRY",
+    "CRZ": "CRZ",
     "CTRL": None,
-    "StatePrep": qml.StatePrep,
-    "BasisState": qml.BasisState,
-    "SingleExcitation": qml.SingleExcitation,
-    "DoubleExcitation": qml.DoubleExcitation,
+    "StatePrep": "StatePrep",
+    "BasisState": "BasisState",
+    "SingleExcitation": "SingleExcitation",
+    "DoubleExcitation": "DoubleExcitation",
     "HartreeFock": None,
-}
\ No newline at end of file
+    "QubitUnitary": "QubitUnitary",
+    "CHECKPOINT": None,
+})
+
+OP_NAMES = list(PL_NAME_MAP)
+OPCODES = {name: i for i, name in enumerate(OP_NAMES)}
@@ -0,0 +1,246 @@
+# mps.py
+import numpy as np
+from . import profiling
+from .ir import *
+from .simulator import (FIXED_MATRICES, OperatorCache, basis_bits, ctrl_matrix, gate_matrix,
+                        prep_unitary)
+
+# Read on every call, so changing them never requires recompiling.
+MPS_OPTIONS = {"max_bond": 64, "cutoff": 1e-12}
+# Largest register for which MEASURE("state") or an all-wire "probs" is materialised.
+MAX_DENSE_WIRES = 20
+
+_LAST_RUN = {}
+_SWAP = FIXED_MATRICES["SWAP"]
+
+def set_mps_options(max_bond=None, cutoff=None):
+    if max_bond is not None:
+        if not isinstance(max_bond, int) or max_bond < 1:
+            raise ValueError("MPS 'max_bond' must be a positive integer.")
+        MPS_OPTIONS["max_bond"] = max_bond
+    if cutoff is not None:
+        if cutoff < 0:
+            raise ValueError("MPS 'cutoff' must be non-negative.")
+        MPS_OPTIONS["cutoff"] = float(cutoff)
+    settings_changed()
+
+def mps_info():
+    # Options, plus bond dimensions and truncation error of the most recent MPS execution.
+    return {**MPS_OPTIONS, **_LAST_RUN}
+
+# ---Matrix Product State---
+
+class MPS:
+    # Site tensors of shape (left bond, 2, right bond) in mixed canonical form around `center`.
+    def __init__(self, n, dtype=np.complex128, max_bond=64, cutoff=1e-12):
+        zero = np.zeros((1, 2, 1), dtype=dtype)
+        zero[0, 0, 0] = 1
+        self.tensors = [zero.copy() for _ in range(n)]
+        self.dtype = np.dtype(dtype)
+        self.center = 0
+        self.max_bond, self.cutoff = max_bond, cutoff
+        # 1 - prod(1 - discarded weight) over all SVDs: an upper bound on the state's infidelity.
+        self.truncation_error = 0.0
+        self.swaps = 0
+
+    def bond_dims(self):
+        return [t.shape[2] for t in self.tensors[:-1]]
+
+    def nbytes(self):
+        return sum(t.nbytes for t in self.tensors)
+
+    def _move_center(self, site):
+        A = self.tensors
+        while self.center < site:
+            c = self.center
+            dl, _, dr = A[c].shape
+            q, r = np.linalg.qr(A[c].reshape(dl * 2, dr))
+            A[c] = q.reshape(dl, 2, -1)
+            A[c + 1] = np.tensordot(r, A[c + 1], axes=(1, 0))
+            self.center += 1
+        while self.center > site:
+            c = self.center
+            dl, _, dr = A[c].shape
+            q, r = np.linalg.qr(A[c].reshape(dl, 2 * dr).T)
+            A[c] = q.T.reshape(-1, 2, dr)
+            A[c - 1] = np.tensordot(A[c - 1], r.T, axes=(2, 0))
+            self.center -= 1
+
+    def _truncate(self, s):
+        # Keeps at most max_bond values and drops any tail whose weight is below cutoff.
+        weights = s ** 2
+        total = weights.sum()
+        tail = np.cumsum(weights[::-1])[::-1] / total
+        keep = min(len(s), self.max_bond, max(1, int(np.count_nonzero(tail > self.cutoff))))
+        if keep < len(s):
+            self.truncation_error = 1.0 - (1.0 - self.truncation_error) * (1.0 - float(tail[keep]))
+        kept = s[:keep]
+        return kept * np.sqrt(total / weights[:keep].sum())
+
+    def _apply_local(self, matrix, p, k):
+        # Applies a 2^k x 2^k matrix to adjacent sites p..p+k-1, splitting back with SVDs.
+        A = self.tensors
+        matrix = np.asarray(matrix).astype(self.dtype, copy=False)
+        if k == 1:
+            # A one-site unitary keeps the canonical form as it is.
+            A[p] = np.einsum("st,atb->asb", matrix, A[p])
+            return
+        self._move_center(p)
+        theta = A[p]
+        for i in range(1, k):
+            theta = np.tensordot(theta, A[p + i], axes=(-1, 0))
+        dl, dr = theta.shape[0], theta.shape[-1]
+        theta = np.einsum("st,atb->asb", matrix, theta.reshape(dl, 2 ** k, dr))
+        for i in range(k - 1):
+            rest = 2 ** (k - 1 - i)
+            u, s, vh = np.linalg.svd(theta.reshape(theta.shape[0] * 2, rest * dr), full_matrices=False)
+            s = self._truncate(s)
+            keep = len(s)
+            A[p + i] = u[:, :keep].reshape(-1, 2, keep)
+            theta = (s[:, None] * vh[:keep]).astype(self.dtype, copy=False).reshape(keep, rest, dr)
+        A[p + k - 1] = theta.reshape(-1, 2, dr)
+        self.center = p + k - 1
+
+    def apply(self, matrix, wires):
+        # Non-adjacent wires are brought next to each other, in gate order, by SWAPs and moved back after.
+        p = min(wires)
+        if list(wires) == list(range(p, p + len(wires))):
+            self._apply_local(matrix, p, len(wires))
+            return
+        site = {w: w for w in range(p, max(wires) + 1)}
+        wire_at = dict(site)
+        swaps = []
+        for j, w in enumerate(wires):
+            s = site[w]
+            while s > p + j:
+                self._apply_local(_SWAP, s - 1, 2)
+                swaps.append(s - 1)
+                a, b = wire_at[s - 1], wire_at[s]
+                wire_at[s - 1], wire_at[s] = b, a
+                site[a], site[b] = s, s - 1
+                s -= 1
+        self._apply_local(matrix, p, len(wires))
+        for s in reversed(swaps):
+            self._apply_local(_SWAP, s, 2)
+        self.swaps += 2 * len(swaps)
+
+    # ---Measurements---
+
+    def probs(self, wires):
+        # Marginal distribution of `wires`, contracted site by site; only 2^len(wires) values are formed.
+        order = sorted(wires)
+        wanted = set(order)
+        lo, hi = order[0], order[-1]
+        self._move_center(lo)
+        E = np.eye(self.tensors[lo].shape[0], dtype=self.dtype)
+        for site in range(lo, hi + 1):
+            A = self.tensors[site]
+            out = "...scd" if site in wanted else "...cd"
+            E = np.einsum(f"...ab,asc,bsd->{out}", E, A.conj(), A, optimize=True)
+        p = np.real(np.einsum("...cc->...", E))
+        p = np.transpose(p, [order.index(w) for w in wires]).reshape(-1)
+        return np.clip(p, 0.0, None)
+
+    def expval(self, factors):
+        # <psi| prod_w factors[w] |psi> for one-wire matrices, swept only over the wires they touch.
+        lo, hi = min(factors), max(factors)
+        self._move_center(lo)
+        E = np.eye(self.tensors[lo].shape[0], dtype=self.dtype)
+        for site in range(lo, hi + 1):
+            A = self.tensors[site]
+            B = A if site not in factors else np.einsum("st,atb->asb", factors[site], A)
+            E = np.einsum("ab,asc,bsd->cd", E, A.conj(), B, optimize=True)
+        return np.trace(E)
+
+    def state(self):
+        psi = np.ones((1, 1), dtype=self.dtype)
+        for A in self.tensors:
+            psi = np.tensordot(psi, A, axes=(-1, 0)).reshape(-1, A.shape[2])
+        return psi.reshape(-1)
+
+def _prep_unitary(vec):
+    # A unitary whose first column is `vec`, so it prepares |vec> from |0...0>.
+    vec = np.asarray(vec, dtype=complex).ravel()
+    basis = np.eye(len(vec), dtype=complex)
+    basis[:, 0] = vec
+    q, r = np.linalg.qr(basis)
+    q[:, 0] *= r[0, 0]
+    return q
+
+def _pauli_factors(operator):
+    import pennylane as qml
+    try:
+        sentence = qml.pauli.pauli_sentence(operator)
+    except Exception:
+        raise ValueError("The mps backend only measures Pauli-word observables.") from None
+    return [(complex(coeff), {int(w): FIXED_MATRICES[p] for w, p in word.items()})
+            for word, coeff in sentence.items()]
+
+def compile_to_mps(ir, dtype=np.complex128):
+    dtype = np.dtype(dtype)
+    term_cache = OperatorCache(_pauli_factors)
+
+    def _terms(measure):
+        if measure.operator is None:
+            return [(1.0, {int(w): gate_matrix(measure.observable) for w in measure.wires})]
+        return term_cache.terms(measure.operator)
+
+    def _dense_wires(wires, n):
+        wires = list(range(n)) if wires is None else [int(w) for w in wires]
+        if len(wires) > MAX_DENSE_WIRES:
+            raise ValueError(f"The mps backend only returns results over at most {MAX_DENSE_WIRES} wires; "
+                             f"measure a subset of the {n} wires.")
+        return wires
+
+    def circuit(*args, _ir=ir, **kwargs):
+        bindings = _ir.bind(*args, **kwargs)
+        n = _ir.width
+        mps = MPS(n, dtype, **MPS_OPTIONS)
+
+        outputs, touched = [], set()
+        for op in _ir.ops:
+            if not hasattr(op, "name"):
+                outputs.append(op)
+                continue
+            wires = [int(w) for w in op.wires]
+            if op.name == "CHECKPOINT":
+                continue
+            elif op.name == "CTRL":
+                mps.apply(ctrl_matrix(op.params[0], len(wires) - 1), wires)
+            elif op.name == "StatePrep":
+                # On wires still in |0> any unitary with the right first column will do.
+                fresh = not touched.intersection(wires)
+                mps.apply(_prep_unitary(op.params[0]) if fresh else prep_unitary(op.params[0]), wires)
+            elif op.name in ("BasisState", "HartreeFock"):
+                for w, b in zip(wires, basis_bits(op)):
+                    if int(b):
+                        mps.apply(FIXED_MATRICES["X"], [w])
+            else:
+                mat = gate_matrix(op.name, [resolve(p, bindings) for p in op.params])
+                if mat.ndim != 2:
+                    raise ValueError("The mps backend does not support broadcast parameters.")
+                mps.apply(mat, wires)
+            touched.update(wires)
+
+        if not outputs:
+            raise RuntimeError("No MEASURE outputs specified.")
+
+        returns = []
+        for m in outputs:
+            if m.kind == "state":
+                _dense_wires(None, n)
+                returns.append(mps.state())
+            elif m.kind == "probs":
+                returns.append(mps.probs(_dense_wires(m.wires, n)))
+            elif m.kind == "expval":
+                returns.append(sum(float(np.real(c * (mps.expval(f) if f else 1.0))) for c, f in _terms(m)))
+            else:
+                print(f"RuntimeError: Unsupported MEASURE kind: {m.kind}")
+
+        _LAST_RUN.update(truncation_error=mps.truncation_error, bond_dims=mps.bond_dims(),
+                         swaps=mps.swaps, nbytes=mps.nbytes())
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.state_bytes(mps.nbytes())
+        return returns[0] if len(returns) == 1 else tuple(returns)
+
+    return circuit
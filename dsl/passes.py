@@ -0,0 +1,109 @@
+# passes.py
+import numpy as np
+from .ir import *
+from .simulator import gate_matrix
+
+SELF_INVERSE = {"H", "X", "Y", "Z", "CNOT", "CZ", "CY", "SWAP"}
+SYMMETRIC = {"CZ", "SWAP"}
+ROTATIONS = {"RX", "RY", "RZ", "CRX", "CRY", "CRZ"}
+SINGLE_QUBIT = {"H", "X", "Y", "Z", "RX", "RY", "RZ", "QubitUnitary"}
+
+def _is_gate(op):
+    return hasattr(op, "name") and op.name not in ("StatePrep", "BasisState", "HartreeFock", "CHECKPOINT")
+
+def _same_wires(a, b):
+    if a.name in SYMMETRIC:
+        return sorted(a.wires) == sorted(b.wires)
+    return list(a.wires) == list(b.wires)
+
+def _numeric(op):
+    # Bound, unbroadcast parameters only: a batch of angles cannot be merged or fused into one gate.
+    if op.name == "QubitUnitary":
+        return np.ndim(op.params[0]) == 2
+    return all(not isinstance(p, Param) and np.ndim(p) == 0 for p in op.params)
+
+def _zero_angle(theta):
+    # Rotations have period 4*pi; at 2*pi a controlled rotation is not the identity.
+    return np.isclose(np.mod(theta + 2 * np.pi, 4 * np.pi) - 2 * np.pi, 0.0)
+
+def _barrier_wires(op, active):
+    # Measurements and CHECKPOINT block every wire; state preparation blocks the wires it writes.
+    if not hasattr(op, "name") or not getattr(op, "wires", None):
+        return list(active)
+    return list(op.wires)
+
+
+def cancel_and_merge(ops):
+    # Cancels adjacent self-inverse pairs and merges adjacent same-axis rotations.
+    out = []
+    stacks = {}
+    for op in ops:
+        if not _is_gate(op):
+            for w in _barrier_wires(op, stacks):
+                stacks[w] = []
+            out.append(op)
+            continue
+        wires = list(op.wires)
+
+        tops = {stacks[w][-1] if stacks.get(w) else None for w in wires}
+        j = tops.pop() if len(tops) == 1 else None
+        prev = out[j] if j is not None else None
+        if prev is not None and prev.name == op.name and _same_wires(prev, op):
+            if op.name in SELF_INVERSE:
+                out[j] = None
+                for w in wires:
+                    stacks[w].pop()
+                continue
+            if op.name in ROTATIONS and _numeric(prev) and _numeric(op):
+                theta = prev.params[0] + op.params[0]
+                if _zero_angle(theta):
+                    out[j] = None
+                    for w in wires:
+                        stacks[w].pop()
+                else:
+                    out[j] = Op(op.name, prev.wires, params=(theta,))
+                continue
+
+        out.append(op)
+        for w in wires:
+            stacks.setdefault(w, []).append(len(out) - 1)
+    return [op for op in out if op is not None]
+
+
+def fuse_single_qubit(ops):
+    # Replaces runs of two or more numeric single-qubit gates on one wire by a QubitUnitary.
+    out = []
+    runs = {}
+
+    def flush(w):
+        run = runs.pop(w, [])
+        if len(run) == 1:
+            out.append(run[0])
+        elif run:
+            u = np.eye(2, dtype=complex)
+            for op in run:
+                u = gate_matrix(op.name, op.params) @ u
+            if not np.allclose(u, np.eye(2)):
+                out.append(Op("QubitUnitary", [w], params=(u,)))
+
+    for op in ops:
+        if _is_gate(op) and op.name in SINGLE_QUBIT and len(op.wires) == 1 and _numeric(op):
+            runs.setdefault(op.wires[0], []).append(op)
+            continue
+        for w in (op.wires if _is_gate(op) else _barrier_wires(op, runs)):
+            if w in runs:
+                flush(w)
+        out.append(op)
+    for w in list(runs):
+        flush(w)
+    return out
+
+
+def optimise(ir, level=1):
+    # Level 1: cancellation and rotation merging. Level 2: also single-qubit fusion.
+    before = len(ir.ops)
+    ops = cancel_and_merge(ir.ops)
+    if level >= 2:
+        ops = cancel_and_merge(fuse_single_qubit(ops))
+    ir.ops = CompactOps(ops) if ir.compact else ops
+    return before - len(ops)
@@ -0,0 +1,91 @@
+# profiling.py
+import json
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+# The profiler currently collecting, or None. Hooks check this first so they cost
+# a single attribute lookup when profiling is off.
+ACTIVE = None
+
+_NULL = nullcontext()
+
+class _Phase:
+    __slots__ = ("profiler", "name", "start")
+    def __init__(self, profiler, name):
+        self.profiler, self.name = profiler, name
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+class Profiler:
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.phases = {}
+        self.counters = {}
+        self.gate_counts = {}
+        self.optimise_calls = []
+        self.peak_state_bytes = 0
+        self._previous = None
+
+    def __enter__(self):
+        global ACTIVE
+        self._previous, ACTIVE = ACTIVE, self
+        return self
+
+    def __exit__(self, *exc):
+        global ACTIVE
+        ACTIVE = self._previous
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def record(self, name, seconds):
+        entry = self.phases.setdefault(name, {"calls": 0, "seconds": 0.0})
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        if self.callback is not None:
+            self.callback(name, seconds)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def count_gate(self, name):
+        self.gate_counts[name] = self.gate_counts.get(name, 0) + 1
+
+    def state_bytes(self, nbytes):
+        self.peak_state_bytes = max(self.peak_state_bytes, int(nbytes))
+
+    def to_dict(self):
+        return {
+            "phases": {k: dict(v) for k, v in self.phases.items()},
+            "counters": dict(self.counters),
+            "gate_counts": dict(self.gate_counts),
+            "optimise": list(self.optimise_calls),
+            "peak_state_bytes": self.peak_state_bytes,
+        }
+
+    def to_json(self, path=None, **kwargs):
+        text = json.dumps(self.to_dict(), **kwargs)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+def phase(name):
+    # Timing context for a named phase; a shared no-op when profiling is off.
+    return ACTIVE.phase(name) if ACTIVE is not None else _NULL
+
+def timed(name):
+    # Decorator form of phase() for whole API calls.
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if ACTIVE is None:
+                return fn(*args, **kwargs)
+            with ACTIVE.phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -1,6 +1,12 @@
 # program.py
+import time
+import numpy as np
+from . import profiling
 from .ir import *
+from .ir import _freeze
 from .compiler import *
+from .serialize import save_ir, load_ir
+from .sampling import iter_sample_indices, to_bits
 
 _stack = []
 
@@ -9,22 +15,187 @@ def current_program():
         print("RunTime Error: No active Program")
     return _stack[-1]
 
+def record_ops(width, fn, *args, **kwargs):
+    # Runs a block body against a scratch Program and returns the ops it appended.
+    scratch = Program(width)
+    _stack.append(scratch)
+    try:
+        fn(*args, **kwargs)
+    finally:
+        _stack.pop()
+    return scratch.ir.ops
+
+def _read_only(result):
+    # Memoized arrays are shared between calls, so in-place edits must not change them.
+    for value in (result if isinstance(result, tuple) else (result,)):
+        if isinstance(value, np.ndarray):
+            value.setflags(write=False)
+    return result
+
 class Program:
-    def __init__(self, width):
-        self.ir = IRProgram(width=width)
+    def __init__(self, width, compact=False, precision="double"):
+        self.ir = IRProgram(width=width, compact=compact)
+        self.dtype = resolve_dtype(precision)
+        self.backend = "pennylane" if self.dtype == np.complex128 else "numpy"
+        self.shots = None
+        self._rng = None
         self._compiled = None
+        # Backend that automatic stabilizer routing replaced, if any.
+        self._routed_from = None
+        # Bumped on every append/extend; compiled circuits and memoized results carry the version
+        # they were built for, so later mutations make them stale.
+        self.version = 0
+        self.memoize = True
+        self._compiled_version = None
+        self._compile_options = {}
+        self._memo = None
 
     def append(self, op_or_meas): 
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.count_gate(getattr(op_or_meas, "name", "MEASURE"))
         self.ir.ops.append(op_or_meas)
+        self.version += 1
+
+    def extend(self, ops):
+        if profiling.ACTIVE is not None:
+            for op in ops:
+                profiling.ACTIVE.count_gate(getattr(op, "name", "MEASURE"))
+        self.ir.ops.extend(ops)
+        self.version += 1
 
-    def compile(self, shots=None):
-        self.ir.canon()
-        self._compiled = compile_to_pennylane(self.ir)
+    def compile(self, shots=None, cache=True, backend=None, opt_level=0, seed=None,
+                chunk_size=DEFAULT_CHUNK, dtype=None):
+        options = dict(shots=shots, cache=cache, backend=backend, opt_level=opt_level, seed=seed,
+                       chunk_size=chunk_size, dtype=dtype)
+        dtype = self.dtype if dtype is None else resolve_dtype(dtype)
+        route = backend is None
+        if route and self._routed_from is not None:
+            # The stabilizer engine was picked automatically last time; decide again for the current IR.
+            self.backend, self._routed_from = self._routed_from, None
+        if backend is None and dtype == np.complex64 and self.backend not in DTYPE_BACKENDS:
+            # Single precision needs a backend that supports it.
+            backend = "numpy"
+        backend = backend or self.backend
+        get_compiler(backend, dtype)
+        self.backend, self.dtype = backend, dtype
+        with profiling.phase("canon"):
+            self.ir.canon(opt_level=opt_level)
+        if route and stabilizer_routing() and self.backend != "stabilizer" and is_clifford(self.ir):
+            self._routed_from, self.backend = self.backend, "stabilizer"
+        if shots is not None and (not isinstance(shots, int) or shots <= 0):
+            raise ValueError("compile 'shots' must be a positive integer or None.")
+        self.shots = shots
+        with profiling.phase("compile"):
+            compiled = self._compile(shots, cache, seed, chunk_size)
+        self._compile_options, self._compiled_version, self._memo = options, self.version, None
+        return compiled
+
+    def _compile(self, shots, cache, seed, chunk_size):
+        if shots is not None:
+            self._rng = np.random.default_rng(seed)
+            self._compiled = compile_with_shots(self.ir, shots, backend=self.backend, rng=self._rng,
+                                                chunk_size=chunk_size, dtype=self.dtype)
+            return self._compiled
+        if any(getattr(op, "kind", None) in ("counts", "sample") for op in self.ir.ops):
+            raise ValueError("MEASURE('counts') and MEASURE('sample') require compile(shots=N).")
+        if cache:
+            self._compiled = compile_cached(self.ir, backend=self.backend, dtype=self.dtype)
+        else:
+            self._compiled = get_compiler(self.backend, self.dtype)(self.ir)
         return self._compiled
 
+    def is_stale(self):
+        return self._compiled is None or self._compiled_version != self.version
+
+    def _memo_key(self, args, kwargs):
+        # None when results must not be reused: shots draw fresh samples on every call.
+        if not self.memoize or self.shots is not None:
+            return None
+        try:
+            return (self.version, SETTINGS["generation"], _freeze(args),
+                    _freeze(tuple(sorted(kwargs.items()))))
+        except TypeError:
+            return None
+
+    def last_result(self):
+        # Result of the latest call if neither the IR nor a global setting has changed since, else None.
+        if self._memo is None or self._memo[0][:2] != (self.version, SETTINGS["generation"]):
+            return None
+        return self._memo[1]
+
     def __call__(self, *args, **kwargs):
-        if self._compiled is None: self.compile()
-        return self._compiled(*args, **kwargs)
+        if self._compiled is None:
+            self.compile()
+        elif self._compiled_version != self.version:
+            # The IR changed after compile(); rebuild with the same options.
+            self.compile(**self._compile_options)
+        key = self._memo_key(args, kwargs)
+        if key is not None and self._memo is not None and self._memo[0] == key:
+            if profiling.ACTIVE is not None:
+                profiling.ACTIVE.count("memo_hits")
+            return self._memo[1]
+        if profiling.ACTIVE is None:
+            result = self._compiled(*args, **kwargs)
+        else:
+            profiling.ACTIVE.count("executions")
+            if self.backend == "pennylane":
+                profiling.ACTIVE.state_bytes(self.dtype.itemsize * 2 ** self.ir.width)
+            with profiling.phase("execute"):
+                result = self._compiled(*args, **kwargs)
+        if key is not None:
+            self._memo = (key, _read_only(result))
+        return result
+
+    def run_batch(self, param_matrix):
+        # Each row of `param_matrix` is one parameter set; all rows run as one broadcast execution.
+        values = np.asarray(param_matrix, dtype=float)
+        if values.ndim == 1:
+            values = values[:, None]
+        if values.ndim != 2:
+            raise ValueError("run_batch expects a 2-D array of parameter sets.")
+        if not self.ir.param_names():
+            raise ValueError("run_batch expects a program with at least one PARAM.")
+        # Columns follow PARAM names in binding order, as positional calls do.
+        return self(*self.ir.split_columns(values))
+
+    def iter_samples(self, *args, chunk_size=DEFAULT_CHUNK, **kwargs):
+        # Streams bit samples of the first counts/sample/probs measurement, chunk by chunk.
+        if self.shots is None:
+            raise ValueError("iter_samples requires compile(shots=N) first.")
+        if self.is_stale():
+            # Same rebuild as __call__, so backend routing, passes and dtype match a normal run.
+            self.compile(**self._compile_options)
+        analytic, layout = analytic_ir(self.ir)
+        first = next((start for m, start, _ in layout if m.kind in ("counts", "sample", "probs")), None)
+        if first is None:
+            raise ValueError("iter_samples needs a MEASURE('counts'), ('sample') or ('probs').")
+        if self.backend == "stabilizer":
+            self.ir.bind(*args, **kwargs)
+            wires = next(m.wires for m, start, _ in layout if start == first) or range(self.ir.width)
+            yield from iter_tableau_samples(self.ir, wires, self.shots, self._rng, chunk_size)
+            return
+        analytic.checkpoint_parent = self.ir
+        results = compile_cached(analytic, backend=self.backend, dtype=self.dtype)(*args, **kwargs)
+        probs = results[first] if isinstance(results, tuple) else results
+        n_wires = int(np.log2(len(probs)))
+        for idx in iter_sample_indices(probs, self.shots, self._rng, chunk_size):
+            yield to_bits(idx, n_wires)
+
+    def save(self, path):
+        save_ir(self.ir, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        ir = load_ir(path, mmap=mmap)
+        program = cls(width=ir.width)
+        program.ir = ir
+        return program
 
-    def __enter__(self): _stack.append(self); return self
-    def __exit__(self, *exc): _stack.pop()
+    def __enter__(self):
+        self._build_start = time.perf_counter()
+        _stack.append(self)
+        return self
+    def __exit__(self, *exc):
+        _stack.pop()
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.record("build", time.perf_counter() - self._build_start)
@@ -0,0 +1,110 @@
+# sampling.py
+import numpy as np
+from .ir import *
+
+DEFAULT_CHUNK = 2**20
+
+def _normalised(probs):
+    p = np.clip(np.real(np.asarray(probs, dtype=float)), 0.0, None)
+    return p / p.sum()
+
+def to_bits(indices, n_wires):
+    shifts = np.arange(n_wires - 1, -1, -1)
+    return ((np.asarray(indices)[:, None] >> shifts) & 1).astype(np.int64)
+
+def iter_sample_indices(probs, shots, rng, chunk_size=DEFAULT_CHUNK):
+    # Yields basis-state indices in chunks, so peak memory is bounded by chunk_size.
+    p = _normalised(probs)
+    remaining = shots
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        yield rng.choice(len(p), size=n, p=p)
+        remaining -= n
+
+def sample_counts(probs, shots, rng, chunk_size=DEFAULT_CHUNK):
+    # Aggregates chunk by chunk; each multinomial draw costs O(len(probs)) memory, not O(shots).
+    p = _normalised(probs)
+    counts = np.zeros(len(p), dtype=np.int64)
+    remaining = shots
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        counts += rng.multinomial(n, p)
+        remaining -= n
+    return counts
+
+def counts_dict(counts, n_wires):
+    return {format(i, f"0{n_wires}b"): int(c) for i, c in enumerate(counts) if c}
+
+def estimate_pm1(expval, shots, rng):
+    # Finite-shot estimate of a +/-1-valued observable with the given exact expectation.
+    p_plus = np.clip((1 + np.asarray(expval, dtype=float)) / 2, 0.0, 1.0)
+    return 2 * rng.binomial(shots, p_plus) / shots - 1
+
+
+def analytic_ir(ir):
+    # Replaces each shot-based measurement by the exact quantities it is sampled from.
+    # Layout entries are (measure, first analytic result, Hamiltonian terms or None).
+    ops, layout, n_out = [], [], 0
+    for op in ir.ops:
+        if hasattr(op, "name"):
+            ops.append(op)
+            continue
+        if op.kind in ("probs", "counts", "sample"):
+            wires = tuple(op.wires) if op.wires else tuple(range(ir.width))
+            ops.append(Measure("probs", wires))
+            layout.append((op, n_out, None))
+            n_out += 1
+        elif op.kind == "expval" and op.operator is not None:
+            terms = _pauli_terms(op.operator)
+            for _, term in terms:
+                if term is not None:
+                    ops.append(Measure("expval", None, operator=term))
+            layout.append((op, n_out, terms))
+            n_out += sum(term is not None for _, term in terms)
+        elif op.kind == "expval":
+            ops.append(op)
+            layout.append((op, n_out, None))
+            n_out += 1
+        else:
+            raise ValueError(f"MEASURE('{op.kind}') cannot be estimated from finite shots.")
+    return IRProgram(ir.width, ops), layout
+
+def _pauli_terms(operator):
+    import pennylane as qml
+    terms = []
+    for word, coeff in qml.pauli.pauli_sentence(operator).items():
+        terms.append((float(np.real(coeff)), word.operation() if len(word) else None))
+    return terms
+
+def _sampled(m, probs, shots, rng, chunk_size):
+    n_wires = int(np.log2(len(probs)))
+    if m.kind == "probs":
+        return sample_counts(probs, shots, rng, chunk_size) / shots
+    if m.kind == "counts":
+        return counts_dict(sample_counts(probs, shots, rng, chunk_size), n_wires)
+    bits = np.concatenate([to_bits(idx, n_wires)
+                           for idx in iter_sample_indices(probs, shots, rng, chunk_size)])
+    return bits[:, 0] if n_wires == 1 else bits
+
+def finite_shot_results(layout, results, shots, rng, chunk_size=DEFAULT_CHUNK):
+    returns = []
+    for m, start, terms in layout:
+        if m.kind in ("probs", "counts", "sample"):
+            probs = np.asarray(results[start])
+            if probs.ndim == 1:
+                out = _sampled(m, probs, shots, rng, chunk_size)
+            else:
+                out = [_sampled(m, p, shots, rng, chunk_size) for p in probs]
+                out = np.array(out) if m.kind == "probs" else out
+        elif terms is not None:
+            out, k = 0.0, start
+            for coeff, term in terms:
+                if term is None:
+                    out = out + coeff
+                else:
+                    out = out + coeff * estimate_pm1(results[k], shots, rng)
+                    k += 1
+        else:
+            out = estimate_pm1(results[start], shots, rng)
+        returns.append(out)
+    return returns
@@ -0,0 +1,190 @@
+# serialize.py
+import json
+import numpy as np
+from .ir import *
+from .ir import _opcode
+
+# Layout: MAGIC | uint64 header length | JSON header | 64-byte aligned raw arrays.
+# The arrays can be memory-mapped straight from disk, so worker processes share one copy.
+MAGIC = b"QDSLIR01"
+_ALIGN = 64
+_ARRAYS = (
+    ("opcodes", np.int16),
+    ("wire_offsets", np.int64),
+    ("wires", np.int32),
+    ("param_offsets", np.int64),
+    ("params", np.float64),
+)
+# Array-valued gate and measurement parameters, flattened into one complex buffer.
+_VALUE_ARRAYS = (
+    ("value_data", np.complex128),
+    ("value_offsets", np.int64),
+    ("value_ndims", np.int64),
+    ("value_shapes", np.int64),
+)
+
+# ---Hamiltonians---
+
+def encode_operator(operator):
+    import pennylane as qml
+    terms = []
+    for word, coeff in qml.pauli.pauli_sentence(operator).items():
+        c = complex(coeff)
+        terms.append([[c.real, c.imag], [[w, p] for w, p in word.items()]])
+    return terms
+
+def decode_operator(terms):
+    import pennylane as qml
+    sentence = qml.pauli.PauliSentence({
+        qml.pauli.PauliWord({w: p for w, p in word}): (re if im == 0 else complex(re, im))
+        for (re, im), word in terms
+    })
+    return sentence.operation()
+
+# ---Parameters and Measurements---
+
+class _ValueArrays:
+    # Collects array parameters while the header is encoded; the header keeps only their index.
+    def __init__(self):
+        self.values = []
+
+    def add(self, arr):
+        self.values.append(arr)
+        return len(self.values) - 1
+
+    def columns(self):
+        sizes = [a.size for a in self.values]
+        return {
+            "value_data": np.concatenate([a.ravel() for a in self.values]) if self.values else [],
+            "value_offsets": np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)]),
+            "value_ndims": [a.ndim for a in self.values],
+            "value_shapes": [d for a in self.values for d in a.shape],
+        }
+
+def _value_arrays(arrays):
+    # Inverse of _ValueArrays.columns: the stored arrays, in order, as complex views.
+    data, offsets = arrays["value_data"], arrays["value_offsets"]
+    dims = np.concatenate([[0], np.cumsum(arrays["value_ndims"])]).astype(int)
+    shapes = arrays["value_shapes"]
+    return [data[offsets[k]:offsets[k + 1]].reshape(tuple(shapes[dims[k]:dims[k + 1]]))
+            for k in range(len(offsets) - 1)]
+
+def _encode_value(v, values):
+    if isinstance(v, Param):
+        return {"param": [v.name, v.index, v.shift]}
+    if isinstance(v, str):
+        return {"str": v}
+    if hasattr(v, "__array__") or isinstance(v, (list, tuple)):
+        arr = np.asarray(v)
+        return {"array": values.add(arr), "dtype": arr.dtype.str}
+    if isinstance(v, (bool, np.bool_)):
+        return {"num": bool(v)}
+    if isinstance(v, (int, np.integer)):
+        return {"num": int(v)}
+    return {"num": float(v)}
+
+def _decode_value(d, values):
+    if "param" in d:
+        name, index, shift = d["param"]
+        return Param(name, index, shift)
+    if "str" in d:
+        return d["str"]
+    if "array" in d:
+        arr = values[d["array"]]
+        dtype = np.dtype(d["dtype"])
+        return (arr if dtype.kind == "c" else arr.real).astype(dtype)
+    return d["num"]
+
+def _encode_measure(m, values):
+    return {
+        "kind": m.kind,
+        "wires": list(m.wires) if m.wires is not None else None,
+        "observable": m.observable,
+        "operator": encode_operator(m.operator) if m.operator is not None else None,
+        "extra": {k: _encode_value(v, values) for k, v in vars(m).items()
+                  if k not in ("kind", "wires", "observable", "operator")},
+    }
+
+def _decode_measure(d, values):
+    operator = decode_operator(d["operator"]) if d["operator"] is not None else None
+    wires = tuple(d["wires"]) if d["wires"] is not None else None
+    m = Measure(d["kind"], wires, observable=d["observable"], operator=operator)
+    for k, v in d.get("extra", {}).items():
+        setattr(m, k, _decode_value(v, values))
+    return m
+
+# ---Programs---
+
+def _pad(n):
+    return (-n) % _ALIGN
+
+def dumps_ir(ir):
+    ops = ir.ops if ir.compact else CompactOps(ir.ops)
+    values = _ValueArrays()
+    header = {
+        "width": ir.width,
+        "op_names": list(OP_NAMES),
+        "extras": {str(i): [_encode_value(p, values) for p in params] for i, params in ops.extras.items()},
+        "measures": {str(i): _encode_measure(m, values) for i, m in ops.measures.items()},
+        "arrays": {},
+    }
+    columns = {name: getattr(ops, name) for name, _ in _ARRAYS}
+    columns.update(values.columns())
+    blobs, offset = [], 0
+    for name, dtype in _ARRAYS + _VALUE_ARRAYS:
+        data = np.ascontiguousarray(columns[name], dtype=dtype).tobytes()
+        header["arrays"][name] = [offset, len(data) // np.dtype(dtype).itemsize]
+        blobs.append(data + b"\0" * _pad(len(data)))
+        offset += len(data) + _pad(len(data))
+    raw = json.dumps(header).encode()
+    raw += b" " * _pad(len(MAGIC) + 8 + len(raw))
+    return b"".join([MAGIC, np.uint64(len(raw)).tobytes(), raw] + blobs)
+
+def _decode(buffer, array_at):
+    if bytes(buffer[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a quantum-dsl IR file.")
+    n = int(np.frombuffer(bytes(buffer[len(MAGIC):len(MAGIC) + 8]), dtype=np.uint64)[0])
+    start = len(MAGIC) + 8
+    header = json.loads(bytes(buffer[start:start + n]).decode())
+    base = start + n
+    arrays = {}
+    for name, dtype in _ARRAYS + _VALUE_ARRAYS:
+        offset, count = header["arrays"][name]
+        arrays[name] = array_at(dtype, base + offset, count)
+
+    # Remap opcodes only if this process numbers gate names differently.
+    names = header["op_names"]
+    opcodes = arrays["opcodes"]
+    if names != OP_NAMES[:len(names)]:
+        table = np.array([_opcode(name) for name in names], dtype=np.int16)
+        opcodes = np.where(opcodes >= 0, table[np.maximum(opcodes, 0)], opcodes).astype(np.int16)
+
+    values = _value_arrays(arrays)
+    ops = CompactOps.from_arrays(
+        opcodes, arrays["wire_offsets"], arrays["wires"], arrays["param_offsets"], arrays["params"],
+        extras={int(i): tuple(_decode_value(p, values) for p in params)
+                for i, params in header["extras"].items()},
+        measures={int(i): _decode_measure(m, values) for i, m in header["measures"].items()},
+    )
+    ir = IRProgram(header["width"])
+    ir.ops = ops
+    return ir
+
+def loads_ir(data):
+    return _decode(data, lambda dtype, offset, count: np.frombuffer(data, dtype=dtype, count=count, offset=offset))
+
+def save_ir(ir, path):
+    with open(path, "wb") as f:
+        f.write(dumps_ir(ir))
+
+def load_ir(path, mmap=True):
+    if not mmap:
+        with open(path, "rb") as f:
+            return loads_ir(f.read())
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def array_at(dtype, offset, count):
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.ndarray((count,), dtype=dtype, buffer=raw, offset=offset)
+    return _decode(raw, array_at)
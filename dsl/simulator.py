@@ -0,0 +1,328 @@
+# simulator.py
+import numpy as np
+from functools import lru_cache
+from . import profiling
+from .ir import *
+
+_LETTERS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# ---Gate Matrices---
+# Angles may be scalars or 1-D arrays (broadcasting); matrices come back as (..., d, d).
+
+def _mat(rows):
+    m = np.array(rows, dtype=complex)
+    return np.moveaxis(m, (0, 1), (-2, -1))
+
+def _rx(t):
+    c, s = np.cos(t / 2), np.sin(t / 2)
+    return _mat([[c, -1j * s], [-1j * s, c]])
+
+def _ry(t):
+    c, s = np.cos(t / 2), np.sin(t / 2)
+    return _mat([[c, -s], [s, c]])
+
+def _rz(t):
+    z = np.zeros_like(t, dtype=complex)
+    return _mat([[np.exp(-0.5j * t), z], [z, np.exp(0.5j * t)]])
+
+def controlled(u, n_controls=1):
+    d = u.shape[-1]
+    dim = d * 2 ** n_controls
+    m = np.broadcast_to(np.eye(dim, dtype=complex), u.shape[:-2] + (dim, dim)).copy()
+    m[..., dim - d:, dim - d:] = u
+    return m
+
+def _excitation(t, dim, i, j):
+    c, s = np.cos(np.asarray(t) / 2), np.sin(np.asarray(t) / 2)
+    m = np.broadcast_to(np.eye(dim, dtype=complex), c.shape + (dim, dim)).copy()
+    m[..., i, i], m[..., i, j] = c, -s
+    m[..., j, i], m[..., j, j] = s, c
+    return m
+
+FIXED_MATRICES = {
+    "H": np.array([[1, 1], [1, -1]], dtype=complex) / np.sqrt(2),
+    "X": np.array([[0, 1], [1, 0]], dtype=complex),
+    "Y": np.array([[0, -1j], [1j, 0]], dtype=complex),
+    "Z": np.array([[1, 0], [0, -1]], dtype=complex),
+    "SWAP": np.array([[1, 0, 0, 0], [0, 0, 1, 0], [0, 1, 0, 0], [0, 0, 0, 1]], dtype=complex),
+}
+FIXED_MATRICES["CNOT"] = controlled(FIXED_MATRICES["X"])
+FIXED_MATRICES["CY"] = controlled(FIXED_MATRICES["Y"])
+FIXED_MATRICES["CZ"] = controlled(FIXED_MATRICES["Z"])
+
+PARAM_MATRICES = {
+    "RX": _rx,
+    "RY": _ry,
+    "RZ": _rz,
+    "CRX": lambda t: controlled(_rx(t)),
+    "CRY": lambda t: controlled(_ry(t)),
+    "CRZ": lambda t: controlled(_rz(t)),
+    "SingleExcitation": lambda t: _excitation(t, 4, 1, 2),
+    "DoubleExcitation": lambda t: _excitation(t, 16, 3, 12),
+}
+
+def gate_matrix(name, params=()):
+    if name in FIXED_MATRICES:
+        return FIXED_MATRICES[name]
+    if name in PARAM_MATRICES:
+        return PARAM_MATRICES[name](np.asarray(params[0], dtype=float))
+    if name == "QubitUnitary":
+        return np.asarray(params[0], dtype=complex)
+    if name == "CTRL":
+        raise ValueError("CTRL matrices depend on the number of control wires; use ctrl_matrix.")
+    raise ValueError(f"No matrix for gate {name}.")
+
+def ctrl_matrix(gate_name, n_controls):
+    return controlled(gate_matrix(gate_name), n_controls)
+
+def op_matrix(op):
+    if op.name == "CTRL":
+        return ctrl_matrix(op.params[0], len(op.wires) - 1)
+    return gate_matrix(op.name, op.params)
+
+def block_unitary(ops):
+    # Product of parameter-free gate ops as one matrix on their sorted wires, built by
+    # evolving every basis state at once: row b of the batch ends up as column b of U.
+    wires = sorted({int(w) for op in ops for w in op.wires})
+    local = {w: i for i, w in enumerate(wires)}
+    dim = 2 ** len(wires)
+    state = np.eye(dim, dtype=complex).reshape((dim,) + (2,) * len(wires))
+    scratch = np.empty_like(state)
+    for op in ops:
+        mat = op_matrix(op)
+        if mat.ndim != 2:
+            raise ValueError(f"Gate {op.name} is broadcast and has no single matrix.")
+        apply_matrix(state, scratch, mat, [local[int(w)] for w in op.wires])
+        state, scratch = scratch, state
+    return state.reshape(dim, dim).T, wires
+
+@lru_cache(maxsize=64)
+def hf_bits(electrons, orbitals, basis="occupation_number"):
+    if basis == "occupation_number":
+        return tuple([1] * electrons + [0] * (orbitals - electrons))
+    from pennylane import qchem
+    return tuple(int(b) for b in qchem.hf_state(electrons, orbitals, basis=basis))
+
+def basis_bits(op):
+    # Bits a BasisState or HartreeFock op writes onto its wires, in wire order.
+    if op.name == "BasisState":
+        return np.asarray(op.params[0]).ravel()
+    basis = op.params[1] if len(op.params) > 1 else 'occupation_number'
+    return hf_bits(op.params[0], len(op.wires), basis)
+
+def prep_unitary(vec):
+    # The unitary PennyLane applies for a StatePrep that is not the first operation (its Mottonen
+    # decomposition). Its first column is `vec`; the other columns matter once the wires left |0>.
+    vec = np.asarray(vec, dtype=complex).ravel()
+    return _mottonen_matrix(vec.tobytes())
+
+@lru_cache(maxsize=64)
+def _mottonen_matrix(raw):
+    import pennylane as qml
+    vec = np.frombuffer(raw, dtype=complex)
+    wires = range(int(np.log2(len(vec))))
+    return qml.matrix(qml.MottonenStatePreparation(vec, wires=wires), wire_order=wires)
+
+class OperatorCache(LRUCache):
+    # Decompositions of measured operators for one compiled circuit. Entries are keyed by id() and
+    # keep the operator alive, so a recycled id never returns another operator's terms. The circuit
+    # is shared by every structurally identical program, so only the most recent few are kept.
+    def __init__(self, decompose, maxsize=16):
+        super().__init__(maxsize)
+        self.decompose = decompose
+
+    def terms(self, operator):
+        cached = self.get(id(operator))
+        if cached is None or cached[0] is not operator:
+            cached = (operator, self.decompose(operator))
+            self.put(id(operator), cached)
+        return cached[1]
+
+# ---Kernels---
+
+def apply_matrix(state, out, mat, wires):
+    # out[..., i, ...] = sum_j mat[..., i, j] state[..., j, ...] over the target wires.
+    k = len(wires)
+    n = state.ndim - 1
+    m = np.asarray(mat).astype(state.dtype, copy=False).reshape((-1,) + (2,) * (2 * k))
+    idx = _LETTERS[:n]
+    new = _LETTERS[n:n + k]
+    out_idx = list(idx)
+    for w, letter in zip(wires, new):
+        out_idx[w] = letter
+    old = "".join(idx[w] for w in wires)
+    np.einsum(f"...{new}{old},...{idx}->...{''.join(out_idx)}", m, state, out=out)
+    return out
+
+def prepare_substate(state, out, vec, wires):
+    # Writes |vec> on `wires` (assumed to be in |0>) tensored with the rest of the register.
+    n = state.ndim - 1
+    k = len(wires)
+    idx = _LETTERS[:n]
+    rest_axes = [a for a in range(n) if a not in wires]
+    zero = [slice(None)] + [0 if a in wires else slice(None) for a in range(n)]
+    rest = state[tuple(zero)]
+    vec = np.asarray(vec).astype(state.dtype, copy=False).reshape((2,) * k)
+    w_idx = "".join(idx[w] for w in wires)
+    r_idx = "".join(idx[a] for a in rest_axes)
+    np.einsum(f"{w_idx},...{r_idx}->...{idx}", vec, rest, out=out)
+    return out
+
+def probabilities(state, wires):
+    n = state.ndim - 1
+    idx = _LETTERS[:n]
+    p = np.abs(state) ** 2
+    p = np.einsum(f"...{idx}->...{''.join(idx[w] for w in wires)}", p)
+    return p.reshape(p.shape[0], -1)
+
+def expectation(state, scratch, terms):
+    batch = state.shape[0]
+    bra = state.reshape(batch, -1)
+    total = np.zeros(batch)
+    # Inner products accumulate in double precision even for a complex64 state.
+    for coeff, mat, wires in terms:
+        if not wires:
+            total += coeff * np.real(np.einsum("bi,bi->b", np.conj(bra), bra, dtype=np.complex128))
+            continue
+        apply_matrix(state, scratch, mat, wires)
+        total += coeff * np.real(np.einsum("bi,bi->b", np.conj(bra), scratch.reshape(batch, -1),
+                                           dtype=np.complex128))
+    return total
+
+# ---Measurement Operators---
+
+def _operator_terms(operator):
+    import pennylane as qml
+    try:
+        coeffs, ops = operator.terms()
+    except Exception:
+        coeffs, ops = [1.0], [operator]
+    terms = []
+    for c, op in zip(coeffs, ops):
+        wires = [int(w) for w in op.wires]
+        if isinstance(op, qml.Identity):
+            terms.append((float(np.real(c)), None, []))
+        else:
+            terms.append((float(np.real(c)), qml.matrix(op, wire_order=op.wires), wires))
+    return terms
+
+
+# ---Checkpoints---
+
+CHECKPOINTING = True
+
+def prefix_state(ir, dtype=np.complex128):
+    # (k, state after ops[:k]) for the IR's checkpoint prefix, or (0, None). The state is
+    # cached on the IRProgram and recomputed only if its op list is replaced or grows.
+    if not CHECKPOINTING:
+        return 0, None
+    cached = getattr(ir, "_checkpoint", None)
+    if (cached is not None and cached[0] is ir.ops and cached[1] == len(ir.ops)
+            and (cached[3] is None or cached[3].dtype == dtype)):
+        return cached[2], cached[3]
+    parent = getattr(ir, "checkpoint_parent", None)
+    if parent is not None:
+        # Parameter-shift copies differ from their parent only after the prefix.
+        k, state = prefix_state(parent, dtype)
+    else:
+        k, state = ir.checkpoint_length(), None
+        ops = [op for op in ir.ops[:k] if op.name != "CHECKPOINT"]
+        if ops:
+            prefix = IRProgram(ir.width, ops + [Measure("state")])
+            state = compile_to_numpy(prefix, dtype, checkpoint=False)()
+            if state.ndim != 1:
+                # A broadcast angle in the prefix: there is no single state to resume from.
+                k, state = 0, None
+        else:
+            k = 0
+    ir._checkpoint = (ir.ops, len(ir.ops), k, state)
+    return k, state
+
+def compile_to_numpy(ir, dtype=np.complex128, checkpoint=True):
+    dtype = np.dtype(dtype)
+    buffers = {}
+    term_cache = OperatorCache(_operator_terms)
+
+    def _buffers(batch, width):
+        key = (batch, width)
+        if key not in buffers:
+            shape = (batch,) + (2,) * width
+            buffers.clear()
+            buffers[key] = (np.empty(shape, dtype=dtype), np.empty(shape, dtype=dtype))
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.state_bytes(2 * buffers[key][0].nbytes)
+        return buffers[key]
+
+    def _terms(measure):
+        operator = measure.operator
+        if operator is None:
+            return [(1.0, gate_matrix(measure.observable), list(measure.wires))]
+        return term_cache.terms(operator)
+
+    def circuit(*args, _ir=ir, **kwargs):
+        bindings = _ir.bind(*args, **kwargs)
+        n = _ir.width
+        start, initial = prefix_state(_ir, dtype) if checkpoint else (0, None)
+
+        # Resolve angles first so broadcast batch size is known before allocating.
+        plan, outputs, batch = [], [], 1
+        # Wires that may have left |0>; a resumed prefix may have touched any of them.
+        touched = set(range(n)) if start else set()
+        for op in (_ir.ops[start:] if start else _ir.ops):
+            if not hasattr(op, "name"):
+                outputs.append(op)
+                continue
+            wires = [int(w) for w in op.wires]
+            if op.name == "CHECKPOINT":
+                continue
+            elif op.name == "CTRL":
+                plan.append(("gate", ctrl_matrix(op.params[0], len(wires) - 1), wires))
+            elif op.name == "StatePrep":
+                if touched.intersection(wires):
+                    plan.append(("gate", prep_unitary(op.params[0]), wires))
+                else:
+                    plan.append(("prep", op.params[0], wires))
+            elif op.name in ("BasisState", "HartreeFock"):
+                # Applied as X flips, like PennyLane does for a basis state after the first op.
+                plan.extend(("gate", FIXED_MATRICES["X"], [w])
+                            for w, b in zip(wires, basis_bits(op)) if int(b))
+            else:
+                values = [resolve(p, bindings) for p in op.params]
+                mat = gate_matrix(op.name, values)
+                if mat.ndim == 3:
+                    batch = max(batch, mat.shape[0])
+                plan.append(("gate", mat, wires))
+            touched.update(wires)
+
+        if not outputs:
+            raise RuntimeError("No MEASURE outputs specified.")
+
+        state, scratch = _buffers(batch, n)
+        if initial is not None:
+            state[...] = initial.reshape((2,) * n)
+        else:
+            state.fill(0)
+            state[(slice(None),) + (0,) * n] = 1
+        for kind, data, wires in plan:
+            if kind == "gate":
+                apply_matrix(state, scratch, data, wires)
+            else:
+                prepare_substate(state, scratch, data, wires)
+            state, scratch = scratch, state
+
+        returns = []
+        for m in outputs:
+            if m.kind == "state":
+                out = state.reshape(batch, -1).copy()
+            elif m.kind == "probs":
+                out = probabilities(state, [int(w) for w in m.wires])
+            elif m.kind == "expval":
+                out = expectation(state, scratch, _terms(m))
+            else:
+                print(f"RuntimeError: Unsupported MEASURE kind: {m.kind}")
+                continue
+            returns.append(out if batch > 1 else out[0])
+
+        return returns[0] if len(returns) == 1 else tuple(returns)
+
+    return circuit
@@ -0,0 +1,346 @@
+# stabilizer.py
+import numpy as np
+from . import profiling
+from .ir import *
+from .sampling import DEFAULT_CHUNK, estimate_pm1
+from .simulator import OperatorCache, basis_bits
+
+CLIFFORD_GATES = {"H", "X", "Y", "Z", "CNOT", "CZ", "CY", "SWAP"}
+# Single-control CTRL gates that are CNOT, CY or CZ.
+_CTRL_PAULIS = {"X": "CNOT", "Y": "CY", "Z": "CZ"}
+# Largest wire subset whose exact `probs` array is materialised.
+MAX_PROBS_WIRES = 24
+
+_ROUTING = {"enabled": True}
+
+def set_stabilizer_routing(enabled):
+    # When on, compile() without an explicit backend runs Clifford-only programs on the tableau.
+    _ROUTING["enabled"] = bool(enabled)
+    settings_changed()
+
+def stabilizer_routing():
+    return _ROUTING["enabled"]
+
+def _pauli_words(operator):
+    import pennylane as qml
+    words = []
+    for word, coeff in qml.pauli.pauli_sentence(operator).items():
+        words.append((float(np.real(coeff)), {int(w): p for w, p in word.items()}))
+    return words
+
+def is_clifford(ir):
+    # True if every gate and measurement of `ir` can run on the stabilizer tableau.
+    for op in ir.ops:
+        if hasattr(op, "name"):
+            if op.name in CLIFFORD_GATES or op.name in ("BasisState", "HartreeFock", "CHECKPOINT"):
+                continue
+            if op.name == "CTRL" and len(op.wires) == 2 and op.params[0] in _CTRL_PAULIS:
+                continue
+            return False
+        if op.kind == "state":
+            return False
+        if op.kind == "expval":
+            if op.operator is None:
+                if op.observable not in ("X", "Y", "Z"):
+                    return False
+                continue
+            try:
+                _pauli_words(op.operator)
+            except Exception:
+                return False
+    return True
+
+# ---Tableau---
+
+def _g_sum(x1, z1, x2, z2):
+    # Power of i from multiplying Pauli (x1, z1) into (x2, z2), summed over qubits (Aaronson-Gottesman g).
+    # Each qubit contributes -1, 0 or +1, so the sum is a count of +1s minus a count of -1s.
+    y1, only_x1, only_z1 = x1 & z1, x1 & ~z1, z1 & ~x1
+    only_x2, only_z2, y2 = x2 & ~z2, z2 & ~x2, x2 & z2
+    plus = (y1 & only_z2) | (only_x1 & y2) | (only_z1 & only_x2)
+    minus = (y1 & only_x2) | (only_x1 & only_z2) | (only_z1 & y2)
+    return np.count_nonzero(plus, axis=0) - np.count_nonzero(minus, axis=0)
+
+class Tableau:
+    # CHP tableau stored qubit-major: x[q, row], z[q, row]. Rows 0..n-1 are destabilizers and
+    # n..2n-1 stabilizers. While measuring, `dep` tracks which free outcome bits each sign depends on.
+    def __init__(self, n):
+        self.n = n
+        self.x = np.zeros((n, 2 * n), dtype=bool)
+        self.z = np.zeros((n, 2 * n), dtype=bool)
+        self.r = np.zeros(2 * n, dtype=bool)
+        self.dep = None
+        idx = np.arange(n)
+        self.x[idx, idx] = True
+        self.z[idx, n + idx] = True
+
+    def copy(self):
+        t = Tableau.__new__(Tableau)
+        t.n, t.x, t.z, t.r, t.dep = self.n, self.x.copy(), self.z.copy(), self.r.copy(), None
+        return t
+
+    def nbytes(self):
+        return self.x.nbytes + self.z.nbytes + self.r.nbytes
+
+    # ---Gates---
+
+    def h(self, a):
+        x, z = self.x, self.z
+        self.r ^= x[a] & z[a]
+        x[a], z[a] = z[a].copy(), x[a].copy()
+
+    def s(self, a):
+        self.r ^= self.x[a] & self.z[a]
+        self.z[a] ^= self.x[a]
+
+    def pauli_x(self, a):
+        self.r ^= self.z[a]
+
+    def pauli_y(self, a):
+        self.r ^= self.x[a] ^ self.z[a]
+
+    def pauli_z(self, a):
+        self.r ^= self.x[a]
+
+    def cnot(self, a, b):
+        x, z = self.x, self.z
+        self.r ^= x[a] & z[b] & ~(x[b] ^ z[a])
+        x[b] ^= x[a]
+        z[a] ^= z[b]
+
+    def cz(self, a, b):
+        self.h(b)
+        self.cnot(a, b)
+        self.h(b)
+
+    def cy(self, a, b):
+        # CY = S_b CNOT S_b^dagger, with S^dagger = S Z.
+        self.pauli_z(b)
+        self.s(b)
+        self.cnot(a, b)
+        self.s(b)
+
+    def swap(self, a, b):
+        self.x[[a, b]] = self.x[[b, a]]
+        self.z[[a, b]] = self.z[[b, a]]
+
+    def apply(self, op):
+        wires = [int(w) for w in op.wires]
+        name = op.name
+        if name == "CTRL":
+            name = _CTRL_PAULIS[op.params[0]]
+        if name in ("BasisState", "HartreeFock"):
+            for w, b in zip(wires, basis_bits(op)):
+                if int(b):
+                    self.pauli_x(w)
+        elif name != "CHECKPOINT":
+            _GATES[name](self, *wires)
+
+    # ---Measurement---
+
+    def _rowsum(self, h, i):
+        # Rows h <- row i * rows h, keeping track of the sign.
+        x, z, r = self.x, self.z, self.r
+        g = _g_sum(x[:, i, None], z[:, i, None], x[:, h], z[:, h])
+        r[h] = (2 * r[h] + 2 * r[i] + g) % 4 == 2
+        x[:, h] ^= x[:, i, None]
+        z[:, h] ^= z[:, i, None]
+        if self.dep is not None:
+            self.dep[h] ^= self.dep[i]
+
+    def _product_sign(self, rows):
+        # Sign bit of the product of commuting rows, from all prefix products at once.
+        # Only qubits some row acts on contribute, so the others are dropped first.
+        xs, zs = self.x[:, rows], self.z[:, rows]
+        support = np.flatnonzero(xs.any(axis=1) | zs.any(axis=1))
+        xs, zs = xs[support].T, zs[support].T
+        prev_x = np.zeros_like(xs)
+        prev_z = np.zeros_like(zs)
+        prev_x[1:] = np.logical_xor.accumulate(xs, axis=0)[:-1]
+        prev_z[1:] = np.logical_xor.accumulate(zs, axis=0)[:-1]
+        total = 2 * int(self.r[rows].sum()) + int(_g_sum(xs, zs, prev_x, prev_z).sum())
+        return total % 4 == 2
+
+    def measure(self, a, column=None):
+        # Z measurement of wire a. A random outcome is taken as 0 and, while tracking `dep`, becomes
+        # free bit `column`. Returns (bit, was_random, free bits a deterministic outcome flips with).
+        n = self.n
+        stabs = np.flatnonzero(self.x[a, n:])
+        if len(stabs):
+            p = n + stabs[0]
+            rows = np.flatnonzero(self.x[a])
+            rows = rows[rows != p]
+            if len(rows):
+                self._rowsum(rows, p)
+            self.x[:, p - n], self.z[:, p - n], self.r[p - n] = self.x[:, p], self.z[:, p], self.r[p]
+            self.x[:, p] = False
+            self.z[:, p] = False
+            self.z[a, p] = True
+            self.r[p] = False
+            if self.dep is not None:
+                self.dep[p - n] = self.dep[p]
+                self.dep[p] = False
+                self.dep[p, column] = True
+            return False, True, None
+        rows = n + np.flatnonzero(self.x[a, :n])
+        dep = np.logical_xor.reduce(self.dep[rows], axis=0) if self.dep is not None else None
+        return bool(self._product_sign(rows)), False, dep
+
+    def marginal(self, wires):
+        # Outcomes on `wires` are b0 ^ (u @ D) mod 2 for uniformly random bits u; returns (b0, D).
+        # Signs stay affine in the random outcomes, so one pass of measurements is enough.
+        k = len(wires)
+        t = self.copy()
+        t.dep = np.zeros((2 * self.n, k), dtype=bool)
+        b0 = np.zeros(k, dtype=bool)
+        D = np.zeros((k, k), dtype=bool)
+        free = np.zeros(k, dtype=bool)
+        for j, w in enumerate(wires):
+            b0[j], free[j], dep = t.measure(w, j)
+            if free[j]:
+                D[j, j] = True
+            else:
+                D[:, j] = dep
+        return b0, D[free]
+
+    def expval(self, word):
+        # <P> for a Pauli word {wire: "X" | "Y" | "Z"}: 0 unless +-P is in the stabilizer group.
+        if not word:
+            return 1.0
+        n = self.n
+        px = np.zeros(n, dtype=bool)
+        pz = np.zeros(n, dtype=bool)
+        for w, p in word.items():
+            px[w], pz[w] = p in "XY", p in "YZ"
+        anti = ((self.x & pz[:, None]) ^ (self.z & px[:, None])).sum(axis=0) % 2
+        if anti[n:].any():
+            return 0.0
+        return -1.0 if self._product_sign(n + np.flatnonzero(anti[:n])) else 1.0
+
+_GATES = {
+    "H": Tableau.h,
+    "X": Tableau.pauli_x,
+    "Y": Tableau.pauli_y,
+    "Z": Tableau.pauli_z,
+    "CNOT": Tableau.cnot,
+    "CZ": Tableau.cz,
+    "CY": Tableau.cy,
+    "SWAP": Tableau.swap,
+}
+
+# ---Distributions---
+
+def _weights(k):
+    return 1 << np.arange(k - 1, -1, -1, dtype=np.int64)
+
+def _check_probs_width(k):
+    if k > MAX_PROBS_WIRES:
+        raise ValueError(f"The stabilizer backend returns 'probs' over at most {MAX_PROBS_WIRES} wires; "
+                         f"measure a subset or use counts/sample with shots.")
+
+def _exact_probs(b0, D, real):
+    k = len(b0)
+    _check_probs_width(k)
+    w = _weights(k)
+    support = np.array([int(b0 @ w)], dtype=np.int64)
+    for row in D:
+        support = np.concatenate([support, support ^ int(row @ w)])
+    probs = np.zeros(2 ** k, dtype=real)
+    probs[support] = 1.0 / len(support)
+    return probs
+
+def _iter_bits(b0, D, shots, rng, chunk_size):
+    # Bit samples in chunks: each chunk costs O(chunk_size * len(wires)) memory.
+    Du = D.astype(np.int64)
+    remaining = shots
+    while remaining > 0:
+        m = min(chunk_size, remaining)
+        u = rng.integers(0, 2, size=(m, len(D)))
+        yield ((u @ Du) % 2).astype(bool) ^ b0
+        remaining -= m
+
+def _sampled(m, b0, D, shots, rng, chunk_size, real):
+    # Same output formats as sampling.finite_shot_results, without forming 2^len(wires) probabilities.
+    k = len(b0)
+    chunks = _iter_bits(b0, D, shots, rng, chunk_size)
+    if m.kind == "sample":
+        bits = np.concatenate([c.astype(np.int64) for c in chunks])
+        return bits[:, 0] if k == 1 else bits
+    if m.kind == "probs":
+        _check_probs_width(k)
+        counts = np.zeros(2 ** k, dtype=np.int64)
+        for c in chunks:
+            counts += np.bincount(c.astype(np.int64) @ _weights(k), minlength=2 ** k)
+        return (counts / shots).astype(real)
+    counts = {}
+    for c in chunks:
+        keys, n = np.unique(np.packbits(c, axis=1), axis=0, return_counts=True)
+        for key, cnt in zip(keys, n):
+            bits = "".join("1" if b else "0" for b in np.unpackbits(key)[:k])
+            counts[bits] = counts.get(bits, 0) + int(cnt)
+    return dict(sorted(counts.items()))
+
+def iter_tableau_samples(ir, wires, shots, rng, chunk_size=DEFAULT_CHUNK):
+    # Streams bit samples of `wires` chunk by chunk straight from the tableau.
+    t = Tableau(ir.width)
+    for op in ir.ops:
+        if hasattr(op, "name"):
+            t.apply(op)
+    b0, D = t.marginal([int(w) for w in wires])
+    for chunk in _iter_bits(b0, D, shots, rng, chunk_size):
+        yield chunk.astype(np.int64)
+
+# ---Compiler---
+
+def compile_to_stabilizer(ir, dtype=np.complex128, shots=None, rng=None, chunk_size=DEFAULT_CHUNK):
+    # `dtype` only sets the precision of returned probabilities; the tableau itself is exact.
+    real = np.float32 if np.dtype(dtype) == np.complex64 else np.float64
+    rng = rng if rng is not None else np.random.default_rng()
+    word_cache = OperatorCache(_pauli_words)
+
+    def _words(m):
+        if m.operator is None:
+            return [(1.0, {int(w): m.observable for w in m.wires})]
+        return word_cache.terms(m.operator)
+
+    def circuit(*args, _ir=ir, **kwargs):
+        _ir.bind(*args, **kwargs)
+        n = _ir.width
+        t = Tableau(n)
+        outputs = []
+        for op in _ir.ops:
+            if not hasattr(op, "name"):
+                outputs.append(op)
+                continue
+            t.apply(op)
+
+        if not outputs:
+            raise RuntimeError("No MEASURE outputs specified.")
+
+        returns = []
+        for m in outputs:
+            if m.kind in ("probs", "counts", "sample"):
+                wires = [int(w) for w in m.wires] if m.wires else list(range(n))
+                b0, D = t.marginal(wires)
+                if shots is None:
+                    if m.kind != "probs":
+                        raise ValueError(f"MEASURE('{m.kind}') requires compile(shots=N).")
+                    returns.append(_exact_probs(b0, D, real))
+                else:
+                    returns.append(_sampled(m, b0, D, shots, rng, chunk_size, real))
+            elif m.kind == "expval":
+                out = 0.0
+                for coeff, word in _words(m):
+                    value = t.expval(word)
+                    if shots is not None and word:
+                        value = estimate_pm1(value, shots, rng)
+                    out = out + coeff * value
+                returns.append(out)
+            else:
+                raise ValueError(f"The stabilizer backend does not support MEASURE('{m.kind}').")
+
+        if profiling.ACTIVE is not None:
+            profiling.ACTIVE.state_bytes(t.nbytes())
+        return returns[0] if len(returns) == 1 else tuple(returns)
+
+    return circuit
@@ -8,6 +8,8 @@ setup(
         "pennylane",
         "matplotlib",
         "numpy",
+        # OPTIMISE(method="lbfgs"); its callback uses the intermediate_result form.
+        "scipy>=1.11",
     ],
 )
 